@@ -1,18 +1,30 @@
 __version__ = "0.0.21"
 
 from .base_client import BaseApiClient
+from .query_cache import QueryCache
 from .admin import Admin
-from .entity import Entity
+from .import_journal import ImportJournal
+from .entity import Entity, EntityHandle
 from .entity_builder import EntityBuilder
-from .bulk_builder import BulkBuilder
-from .query import Query
+from .bulk_builder import BulkBuilder, BulkBuildError
+from .query import Query, QueryBatch
+from .query_stats import QueryStats, QueryStatsRegistry
+from .prepared_query import PreparedQuery
+from .update_batcher import UpdateBatcher, UpdateBatchError
 from .transaction import Transaction
 from .application import Application
+from .namespaces import NamespaceRegistry, get_registry as get_namespace_registry
 
 _base_client: BaseApiClient = None
 
 
 
-def connect(api_key: str, host: str = "https://entitygraph.azurewebsites.net", ignore_ssl: bool = False):
+def connect(api_key: str, host: str = "https://entitygraph.azurewebsites.net", ignore_ssl: bool = False,
+            query_cache: QueryCache = None, query_stats: QueryStatsRegistry = None):
     global _base_client
-    _base_client = BaseApiClient(api_key=api_key, base_url=host, ignore_ssl=ignore_ssl)
+    _base_client = BaseApiClient(api_key=api_key, base_url=host, ignore_ssl=ignore_ssl, query_cache=query_cache,
+                                 query_stats=query_stats)
+
+
+def register_namespace(namespace: str, prefix: str) -> NamespaceRegistry:
+    return get_namespace_registry().register(namespace, prefix)
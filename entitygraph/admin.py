@@ -1,8 +1,30 @@
-import io
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import gzip
+import hashlib
 import json
+import logging
+import os
 from pathlib import Path
+import re
+from threading import Lock
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
+
+from requests import Response
 
 import entitygraph
+from entitygraph import ntriples, streaming
+from entitygraph.import_journal import ImportJournal
+from entitygraph.streaming import Content
+
+if TYPE_CHECKING:
+    from rdflib import Graph
+
+# Formats with one statement per line, which can be split into parts at any line break
+LINE_BASED_FORMATS = ("application/n-triples", "application/n-quads")
+_BNODE = re.compile(ntriples._BNODE.encode())
 
 
 class Admin:
@@ -13,20 +35,198 @@ class Admin:
 
         self._application_label: str = "default"
 
-    def import_file(self, file_path: Path, file_mimetype: str = "text/turtle", repository: str = "entities"):
+    def import_file(self, file_path: Path, file_mimetype: str = "text/turtle", repository: str = "entities",
+                    chunk_size: int = None, parallelism: int = 4, retries: int = 2,
+                    progress: Callable[[int, int], None] = None, journal: Path = None,
+                    scan_progress: Callable[[int, int], None] = None) -> Response | List[Response]:
         """
         Imports rdf content from file into target repository
 
         :param file_path: Path to the file to import
         :param file_mimetype: The mimetype of the file to import: text/turtle, application/ld+json, application/rdf+xml, application/n-triples, application/n-quads or application/vnd.hdt
         :param repository: The repository type in which the file should be imported: entities, schema, transactions or application
+        :param chunk_size: Split the file into parts of about this many bytes, which are imported concurrently. Only for (uncompressed) N-Triples and N-Quads files, which are split at line breaks. Lines sharing a blank node label are always imported in the same part, a file with blank nodes used throughout may therefore be split into fewer, larger parts
+        :param parallelism: Number of parts uploaded at the same time
+        :param retries: Number of retries for each failed part
+        :param progress: Called with the number of bytes imported so far and the size of the file after each part
+        :param journal: Path of a checkpoint journal (see ImportJournal). Acknowledged parts are recorded in it, a rerun with the same journal skips them and resumes the import
+        :param scan_progress: Called with the number of bytes scanned and the size of the file while a file is split into parts. The whole file is scanned for blank node labels before the first part is sent
+        :return: The response, or the responses of all parts (in order of the parts) if the file was split. None for a file or part skipped because of the journal
         """
         endpoint = "api/admin/import/file"
         params = {'repository': repository, 'mimetype': file_mimetype}
         headers = {'X-Application': self._application_label}
+        checkpoints = ImportJournal(journal, file_path, file_mimetype, repository, self._application_label,
+                                    chunk_size) if journal else None
+
+        if chunk_size:
+            if file_mimetype not in LINE_BASED_FORMATS:
+                raise ValueError(f"Only N-Triples and N-Quads files can be imported in chunks, not {file_mimetype}")
+            return self.__import_chunks(file_path, file_mimetype, endpoint, params, headers, chunk_size, parallelism,
+                                        retries, progress, checkpoints, scan_progress)
+
+        if checkpoints is not None:
+            size = os.path.getsize(file_path)
+            digest = hashlib.sha256()
+            with open(file_path, 'rb') as file:
+                for block in iter(lambda: file.read(1024 * 1024), b''):
+                    digest.update(block)
+            if checkpoints.is_completed(0, size, digest.hexdigest()):
+                logging.info(f"Skipping import of {file_path}, it has already been imported according to {journal}")
+                return None
+
         with open(file_path, 'rb') as file_mono:
             files = {'fileMono': file_mono}
-            return entitygraph._base_client.make_request('POST', endpoint, params=params, headers=headers, files=files)
+            response = entitygraph._base_client.make_request('POST', endpoint, params=params, headers=headers,
+                                                             files=files)
+
+        if checkpoints is not None:
+            checkpoints.complete(0, size, digest.hexdigest())
+        return response
+
+    @staticmethod
+    def __chunks(file_path: Path, chunk_size: int, progress: Callable[[int, int], None] = None,
+                 progress_interval: int = 64 * 1024 * 1024) -> List[Tuple[int, int]]:
+        # (start, end) byte offsets of the parts, each part ends after a line break (or at the end of the file).
+        # Blank node labels are scoped to the file, all lines sharing a label are kept in the same part: when a
+        # label recurs, the part it was first used in is merged with all parts after it
+        chunks = []
+        # Offset of the line each blank node label was first used in, by the 64 bit hash of the label instead of
+        # the label itself, so every label takes the same space. A collision merges parts which could have been
+        # imported separately, it never splits the lines of a label.
+        labels: Dict[int, int] = {}
+        start = offset = 0
+        size = os.path.getsize(file_path)
+        reported = 0
+        with open(file_path, 'rb') as file:
+            for line in file:
+                if b'_:' in line:
+                    for label in _BNODE.findall(line):
+                        first = labels.setdefault(hash(label), offset)
+                        while first < start:
+                            start = chunks.pop()[0]
+                offset += len(line)
+                if offset - start >= chunk_size:
+                    chunks.append((start, offset))
+                    start = offset
+                if progress and offset - reported >= progress_interval:
+                    progress(offset, size)
+                    reported = offset
+        if start < offset:
+            chunks.append((start, offset))
+        if progress:
+            progress(offset, size)
+        return chunks
+
+    @classmethod
+    def __import_chunks(cls, file_path: Path, file_mimetype: str, endpoint: str, params: dict, headers: dict,
+                        chunk_size: int, parallelism: int, retries: int,
+                        progress: Callable[[int, int], None], journal: ImportJournal = None,
+                        scan_progress: Callable[[int, int], None] = None) -> List[Response]:
+        if parallelism < 1:
+            raise ValueError('Parallelism must be greater than 0')
+
+        chunks = cls.__chunks(file_path, chunk_size, scan_progress)
+        total = chunks[-1][1] if chunks else 0
+        imported = 0
+        lock = Lock()
+
+        def send(index: int) -> Response:
+            nonlocal imported
+            start, end = chunks[index]
+            # Parts are read when they are sent, at most `parallelism` parts are held in memory
+            with open(file_path, 'rb') as file:
+                file.seek(start)
+                data = file.read(end - start)
+
+            digest = hashlib.sha256(data).hexdigest() if journal is not None else None
+            if journal is not None and journal.is_completed(start, end, digest):
+                response = None
+            else:
+                response = cls.__send_chunk(index, start, end, data, file_path, file_mimetype, endpoint, params,
+                                            headers, retries)
+                if journal is not None:
+                    journal.complete(start, end, digest)
+
+            with lock:
+                imported += end - start
+                if progress:
+                    progress(imported, total)
+            return response
+
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            futures: List[Future] = [executor.submit(send, index) for index in range(len(chunks))]
+            try:
+                return [future.result() for future in futures]
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    @staticmethod
+    def __send_chunk(index: int, start: int, end: int, data: bytes, file_path: Path, file_mimetype: str,
+                     endpoint: str, params: dict, headers: dict, retries: int) -> Response:
+        for attempt in range(retries + 1):
+            try:
+                files = {'fileMono': (f"{Path(file_path).name}.{index}", data, file_mimetype)}
+                return entitygraph._base_client.make_request('POST', endpoint, params=params,
+                                                             headers=dict(headers), files=files)
+            except Exception as err:
+                if attempt == retries:
+                    raise Exception(f"Import of part {index} (bytes {start}-{end}) of {file_path} failed: {err}")
+                logging.debug(f"Import of part {index} failed ({err}), retrying ({attempt + 1}/{retries})")
+                time.sleep(0.5 * 2 ** attempt)
+
+    def export(self, file_path: Path, repository: str = "entities", compress: bool = None,
+               progress: Callable[[int], None] = None, progress_interval: int = 10000) -> int:
+        """
+        Exports all statements of the target repository into an N-Triples file. The statements are requested
+        with a single CONSTRUCT query, whose response is streamed into the file, memory usage is constant. The
+        server has to respond with N-Triples, other formats are rejected since they cannot be streamed.
+
+        :param file_path: Path of the file to write
+        :param repository: The repository type which should be exported: entities, schema, transactions or application
+        :param compress: Write a gzip compressed file. Defaults to True if the file name ends with .gz
+        :param progress: Called with the total number of statements written, every progress_interval statements and at the end
+        :param progress_interval: Number of statements between two progress calls
+        :return: The number of statements written
+        """
+        if compress is None:
+            compress = str(file_path).endswith('.gz')
+
+        endpoint = "api/query/construct"
+        params = {'repository': repository}
+        headers = {'X-Application': self._application_label, 'Content-Type': 'text/plain',
+                   'Accept': 'application/n-triples'}
+        query = "CONSTRUCT { ?s ?p ?o . } WHERE { ?s ?p ?o . }"
+
+        response: Response = entitygraph._base_client.make_request('POST', endpoint, headers=headers, params=params,
+                                                                   data=query, stream=True)
+        content_type = response.headers.get('Content-Type', 'text/turtle').split(';')[0].strip()
+        if content_type != 'application/n-triples':
+            # Any other format would have to be parsed as a whole, which does not fit into memory for large exports
+            response.close()
+            raise Exception(f"Export requires the server to support application/n-triples, it responded with "
+                            f"{content_type}. No statements were written to {file_path}")
+
+        with (gzip.open(file_path, 'wb') if compress else open(file_path, 'wb')) as file:
+            written = self.__write_statements(response, file, progress, progress_interval)
+
+        if progress:
+            progress(written)
+        return written
+
+    @staticmethod
+    def __write_statements(response: Response, file, progress: Callable[[int], None], progress_interval: int) -> int:
+        count = 0
+        with response:
+            for line in response.iter_lines():
+                if line and not line.startswith(b'#'):
+                    file.write(line + b'\n')
+                    count += 1
+                    if progress and count % progress_interval == 0:
+                        progress(count)
+
+        return count
 
     def import_endpoint(self, sparql_endpoint: dict, repository: str = "entities"):
         """
@@ -40,20 +240,50 @@ class Admin:
         data = json.dumps(sparql_endpoint)
         return entitygraph._base_client.make_request('POST', endpoint, params=params, headers=headers, data=data)
 
-    def import_content(self, rdf_data: str, content_mimetype: str = "text/turtle", repository: str = "entities"):
+    def import_content(self, rdf_data: Content, content_mimetype: str = "text/turtle", repository: str = "entities",
+                       compress: bool = False, chunk_size: int = 1024 * 1024) -> Response:
         """
-        Imports rdf content into the target repository
+        Imports rdf content into the target repository. The content is streamed with chunked transfer encoding,
+        it is never copied as a whole.
 
-        :param rdf_data: The RDF data to import
+        :param rdf_data: The RDF data to import: a string, bytes, memoryview, mmap, a (binary or text) file object or an iterable of str or bytes chunks
         :param content_mimetype: The mimetype of the RDF data to import: text/turtle, application/ld+json, application/rdf+xml, application/n-triples, application/n-quads or application/vnd.hdt
         :param repository: The repository type in which the file should be imported: entities, schema, transactions or application
+        :param compress: Compress the content with gzip while sending it (Content-Encoding: gzip)
+        :param chunk_size: Size of the chunks read from strings, bytes and file objects
         """
         endpoint = "api/admin/import/content"
         params = {'repository': repository}
         headers = {'X-Application': self._application_label, 'Content-Type': content_mimetype}
-        data = io.BytesIO(rdf_data.encode())
+
+        data = streaming.iter_chunks(rdf_data, chunk_size)
+        if compress:
+            headers['Content-Encoding'] = 'gzip'
+            data = streaming.gzip_chunks(data)
+
         return entitygraph._base_client.make_request('POST', endpoint, params=params, headers=headers, data=data)
 
+    def import_graph(self, graph: Graph, repository: str = "entities", batch_size: int = 10000,
+                     compress: bool = False, process: bool = False, start_method: str = None) -> Response:
+        """
+        Imports all statements of a graph into the target repository. The graph is serialized to N-Triples in
+        batches of statements, which are uploaded while the next batches are serialized. The serialized graph is
+        never held in memory as a whole.
+
+        :param graph: The rdflib Graph to import
+        :param repository: The repository type in which the graph should be imported: entities, schema, transactions or application
+        :param batch_size: Number of statements serialized per batch
+        :param compress: Compress the content with gzip while sending it
+        :param process: Serialize in a worker process, the calling thread only uploads. Only with the fork start method the graph is shared with the worker, otherwise it is pickled in the calling thread first (see streaming.in_process)
+        :param start_method: The multiprocessing start method of the worker (fork, spawn or forkserver), defaults to the one configured for multiprocessing
+        """
+        if process:
+            chunks = streaming.in_process(ntriples.serialize, graph, batch_size, start_method=start_method)
+        else:
+            chunks = ntriples.serialize(graph, batch_size)
+
+        return self.import_content(chunks, "application/n-triples", repository, compress)
+
     def reset(self, repository: str = "entities"):
         """
         Removes all statements within the repository
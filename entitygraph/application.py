@@ -1,12 +1,16 @@
+from __future__ import annotations
+
 import json
-from typing import Type, List
+from typing import TYPE_CHECKING, Type, List
 
-from rdflib import Graph, URIRef
 from requests import Response
 
 import entitygraph
 from entitygraph import Entity, Query, Admin, EntityBuilder, BulkBuilder
 
+if TYPE_CHECKING:
+    from rdflib import Graph, URIRef
+
 
 class Application:
     def __init__(self, label: str = None, flags: dict = {"isPersistent": True, "isPublic": True},
@@ -3,14 +3,24 @@ import json
 
 from requests import Response, Request, PreparedRequest
 
+from entitygraph.query_cache import QueryCache
+from entitygraph.query_stats import QueryStatsRegistry
+
+# Endpoints which only read data although they are called with POST
+READ_ONLY_ENDPOINTS = ('api/query/select', 'api/query/construct', 'api/query/ask')
+
 
 class BaseApiClient:
-    def __init__(self, api_key: str, base_url: str, ignore_ssl: bool = False):
+    def __init__(self, api_key: str, base_url: str, ignore_ssl: bool = False, query_cache: QueryCache = None,
+                 query_stats: QueryStatsRegistry = None):
         self.base_url = base_url
         self.api_key = api_key
         self.ignore_ssl = ignore_ssl
+        self.query_cache = query_cache
+        self.query_stats = query_stats
 
-    def make_request(self, method, endpoint, headers=None, params=None, data=None, files=None):
+    def make_request(self, method, endpoint, headers=None, params=None, data=None, files=None, stream=False,
+                     timeout=None):
         url = f"{self.base_url}/{endpoint}"
         headers = headers or {}
         headers.update({
@@ -25,14 +35,26 @@ class BaseApiClient:
 
         with requests.Session() as s:
             prepared_request: PreparedRequest = s.prepare_request(request)
-            response: Response = s.send(prepared_request, verify=not self.ignore_ssl)
+            response: Response = s.send(prepared_request, verify=not self.ignore_ssl, stream=stream,
+                                         timeout=timeout)
 
         if response.status_code not in range(200, 300):
             raise Exception(
                 f"Request {{'url': {request.url}, 'headers': {request.headers}}} failed with status {response.status_code}. Response: {response.text}")
 
+        if self.query_cache is not None and self.__is_write(method, endpoint):
+            self.query_cache.invalidate(headers.get('X-Application'))
+
         return response
 
+    @staticmethod
+    def __is_write(method: str, endpoint: str) -> bool:
+        if endpoint.startswith(READ_ONLY_ENDPOINTS):
+            return False
+
+        # The admin endpoints modify data even if called with GET (e.g. reset)
+        return method.upper() != 'GET' or endpoint.startswith('api/admin/')
+
     # async def make_async_request(self, method, endpoint, headers=None, params=None, data=None, files=None):
     #     url = f"{self.base_url}/{endpoint}"
     #     headers = headers or {}
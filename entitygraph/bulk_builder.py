@@ -1,23 +1,221 @@
+from __future__ import annotations
+
+from collections import deque
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Deque, Dict, Iterable, Iterator, List, Tuple
+
 from requests import Response
 
 import entitygraph
-from entitygraph import EntityBuilder, Entity
+from entitygraph import EntityBuilder, Entity, ntriples
+
+if TYPE_CHECKING:
+    from rdflib import Graph
+
+
+def _connected(graphs: List[Graph]) -> List[List[int]]:
+    # Groups the graphs sharing blank nodes (e.g. linked with link_to_node(property, other.node)), in order of
+    # their first graph. The server creates new blank nodes for every request, they have to be sent together.
+    from rdflib import BNode
+
+    parents = list(range(len(graphs)))
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    owners: Dict[BNode, int] = {}
+    for index, graph in enumerate(graphs):
+        for subject, _, obj in graph:
+            for node in (subject, obj):
+                if isinstance(node, BNode):
+                    owner = owners.setdefault(node, index)
+                    if owner != index:
+                        parents[find(index)] = find(owner)
+
+    groups: Dict[int, List[int]] = {}
+    for index in range(len(graphs)):
+        groups.setdefault(find(index), []).append(index)
+    return list(groups.values())
+
+
+def _serialize(units: Iterable[List[Graph]], max_bytes: int, max_entities: int) -> Iterator[Tuple[bytes, int]]:
+    # Serializes the units (graphs connected by blank nodes) statement by statement and groups them into chunks,
+    # the statements of one unit are never split across chunks. Yields each chunk with its number of units.
+    chunk, size, entities = [], 0, 0
+    for graphs in units:
+        statements = b''.join(b''.join(ntriples.serialize(graph, max(len(graph), 1))) for graph in graphs)
+        if chunk and (size + len(statements) > max_bytes or entities + len(graphs) > max_entities):
+            yield b''.join(chunk), len(chunk)
+            chunk, size, entities = [], 0, 0
+        chunk.append(statements)
+        size += len(statements)
+        entities += len(graphs)
+
+    if chunk:
+        yield b''.join(chunk), len(chunk)
+
+
+# Units of the build, set in the worker processes
+_units: List[List[Graph]] = []
+
+
+def _init_worker(units: List[List[Graph]]) -> None:
+    global _units
+    _units = units
+
+
+def _serialize_units(units: List[List[Graph]], max_bytes: int, max_entities: int) -> List[Tuple[bytes, int]]:
+    return list(_serialize(units, max_bytes, max_entities))
+
+
+def _serialize_range(start: int, end: int, max_bytes: int, max_entities: int) -> List[Tuple[bytes, int]]:
+    return list(_serialize(_units[start:end], max_bytes, max_entities))
+
+
+class _Skipped(Exception):
+    # Raised for the chunks not sent because an earlier chunk failed
+    pass
+
+
+class BulkBuildError(Exception):
+    """
+    Raised by BulkBuilder.build() if a chunk could not be created. Tells which entities were created before.
+    """
+
+    def __init__(self, index: int | None, responses: Dict[int, Response], builders: List[List[EntityBuilder]]):
+        """
+        :param index: The index of the first failed chunk, None if serializing failed
+        :param responses: The responses of the created chunks, by chunk index
+        :param builders: The builders of each chunk serialized so far, by chunk index
+        """
+        self.index: int | None = index
+        self.responses: Dict[int, Response] = responses
+        self.builders: List[List[EntityBuilder]] = builders
+        failed = 'Serializing the entities failed' if index is None else f"Creating chunk {index} failed"
+        super().__init__(f"{failed}, {len(responses)} of {len(builders)} chunks were created")
 
 
 class BulkBuilder:
-    def __init__(self, entity_builders: list[EntityBuilder]):
+    def __init__(self, entity_builders: list[EntityBuilder], max_bytes: int = 4 * 1024 * 1024,
+                 max_entities: int = 1000):
+        """
+        :param entity_builders: The builders of the entities to create
+        :param max_bytes: Maximum size of a single request, unless a single entity is larger
+        :param max_entities: Maximum number of entities created with a single request
+        """
         if entitygraph._base_client is None:
             raise Exception(
                 "Not connected. Please connect using entitygraph.connect(api_key=..., host=...) before using EntityBuilder()")
 
         self._application_label: str = "default"
         self.entity_builders = entity_builders
+        self.max_bytes: int = max_bytes
+        self.max_entities: int = max_entities
+
+    def build(self, processes: int = 0, parallelism: int = 1, queue_size: int = 4,
+              start_method: str = None) -> List[Response]:
+        """
+        Creates all entities. The builders are serialized one by one into chunks bounded by max_bytes and
+        max_entities, each chunk is sent as a separate request. Builders connected by blank nodes (e.g. with
+        link_to_node(property, other.node)) are always sent in the same chunk.
 
-    def build(self):
-        tmp = ''
-        for entity_builder in self.entity_builders:
-            tmp += entity_builder.graph.serialize(format='turtle')
+        Serialization and uploading overlap: chunks are uploaded while the next ones are serialized. Both stages
+        are connected by bounded queues, if the uploads fall behind, serialization waits. If a chunk fails, no
+        further chunks are sent (including the ones already queued for upload), the ones being uploaded at that
+        time are waited for and a BulkBuildError tells which chunks (and builders) were created.
 
+        :param processes: Serialize in a pool of this many worker processes, each serializing max_entities builders at a time. With the fork start method the workers share the builders with this process, otherwise the builders are pickled
+        :param parallelism: Number of chunks uploaded at the same time
+        :param queue_size: Maximum number of chunks (or batches of builders with processes) waiting in each stage
+        :param start_method: The multiprocessing start method of the workers (fork, spawn or forkserver), defaults to the one configured for multiprocessing
+        :return: The responses, in order of the chunks
+        """
         endpoint = f'api/entities'
+        # N-Triples is a subset of Turtle, the chunks are sent as Turtle
         headers = {'X-Application': self._application_label, 'Content-Type': 'text/turtle', 'Accept': 'text/turtle'}
-        entitygraph._base_client.make_request('POST', endpoint, headers=headers, data=tmp)
+
+        # Set by the first failed upload, the chunks still waiting for an upload thread are not sent anymore
+        failure = threading.Event()
+
+        def upload(chunk: bytes) -> Response:
+            if failure.is_set():
+                raise _Skipped()
+            try:
+                return entitygraph._base_client.make_request('POST', endpoint, headers=dict(headers), data=chunk)
+            except Exception:
+                failure.set()
+                raise
+
+        graphs = [entity_builder.graph for entity_builder in self.entity_builders]
+        groups = _connected(graphs)
+        units = [[graphs[index] for index in group] for group in groups]
+        if processes:
+            chunks = self.__serialize_in_processes(units, processes, queue_size, start_method)
+        else:
+            chunks = _serialize(units, self.max_bytes, self.max_entities)
+
+        futures: List[Future] = []
+        builders: List[List[EntityBuilder]] = []
+        unit, received = 0, 0
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            try:
+                for chunk, count in chunks:
+                    builders.append([self.entity_builders[index] for group in groups[unit:unit + count]
+                                     for index in group])
+                    unit += count
+                    if len(futures) - received >= parallelism + queue_size:
+                        futures[received].result()
+                        received += 1
+                    if failure.is_set():
+                        break
+                    futures.append(executor.submit(upload, chunk))
+                return [future.result() for future in futures]
+            except Exception as err:
+                for future in futures:
+                    future.cancel()
+                wait(futures)
+                responses = {index: future.result() for index, future in enumerate(futures)
+                             if not future.cancelled() and future.exception() is None}
+                failed = next((index for index, future in enumerate(futures) if not future.cancelled()
+                               and future.exception() is not None and not isinstance(future.exception(), _Skipped)),
+                              None)
+                raise BulkBuildError(failed, responses, builders) from err
+            finally:
+                chunks.close()
+
+    def __serialize_in_processes(self, units: List[List[Graph]], processes: int, queue_size: int,
+                                 start_method: str = None) -> Iterator[Tuple[bytes, int]]:
+        import multiprocessing
+
+        # The platform default is followed unless a start method is given explicitly, fork is not safe everywhere
+        context = multiprocessing.get_context(start_method)
+        fork = context.get_start_method() == 'fork'
+        if fork:
+            # Forked workers inherit the graphs, only the serialized chunks are passed between the processes
+            executor = ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_worker,
+                                           initargs=(units,))
+        else:
+            executor = ProcessPoolExecutor(max_workers=processes, mp_context=context)
+
+        def submit(start: int) -> Future:
+            end = min(start + self.max_entities, len(units))
+            if fork:
+                return executor.submit(_serialize_range, start, end, self.max_bytes, self.max_entities)
+            return executor.submit(_serialize_units, units[start:end], self.max_bytes, self.max_entities)
+
+        pending: Deque[Future] = deque()
+        try:
+            for start in range(0, len(units), self.max_entities):
+                if len(pending) >= processes + queue_size:
+                    yield from pending.popleft().result()
+                pending.append(submit(start))
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
@@ -1,27 +1,142 @@
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import json
 import logging
 from pathlib import Path
 from random import randint
 import re
-from typing import List, BinaryIO, TextIO
+from typing import TYPE_CHECKING, Iterator, List, BinaryIO, Set, TextIO, Tuple
 from urllib.parse import urlparse
 
-from rdflib import Graph, URIRef
 from requests import Response
 
 import entitygraph
-from entitygraph.namespace_map import namespace_map
+from entitygraph import namespaces, sparql
+
+if TYPE_CHECKING:
+    from rdflib import Graph, URIRef
+
+
+class EntityHandle:
+    """
+    Lightweight reference to an entity as returned by listings. Only the identifier and scope are kept, the
+    full Entity is created on first access to any other attribute (e.g. handle.turtle()).
+    """
+    __slots__ = ('_id', '_application_label', '_entity')
+
+    def __init__(self, entity_id: str, scope: str = "default"):
+        self._id: str = entity_id
+        self._application_label: str = scope
+        self._entity: Entity = None
+
+    @property
+    def identifier(self) -> str:
+        return self._id
+
+    def to_entity(self) -> 'Entity':
+        """
+        Promotes this handle to a full (lazy loaded) Entity. The entity is created once and reused afterwards.
+        """
+        if self._entity is None:
+            entity = Entity(scope=self._application_label)
+            entity._id = self._id
+            self._entity = entity
+        return self._entity
+
+    def __getattr__(self, name: str):
+        # Only public members of Entity are delegated. Private and special names (e.g. looked up by copy and
+        # pickle, or _entity before it is set) must not promote the handle.
+        if name.startswith('_') or not hasattr(Entity, name):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        return getattr(self.to_entity(), name)
+
+    def __reduce__(self):
+        return EntityHandle, (self._id, self._application_label)
+
+    def __str__(self):
+        return str(self.to_entity())
+
+    def __repr__(self):
+        return f"EntityHandle(id={self._id}, scope={self._application_label})"
 
 
 class EntityIterable:
-    def __init__(self, application_label: str, property: str = None):
+    def __init__(self, application_label: str, page_size: int = 100, prefetch: bool = True,
+                 property_uri: URIRef = None):
         self.application_label: str = application_label
-        self.property: str = property
-        self.cache: List[Entity] = []
+        self.property_uri: URIRef = property_uri
+        self.page_size: int = page_size
+        self.prefetch: bool = prefetch
 
-    def __getitem__(self, item):
-        tmp = None
+    def __iter__(self) -> Iterator[EntityHandle]:
+        """
+        Iterates lazily over all entities, page by page. Unless prefetching is disabled, the next page is
+        requested on a background thread while the current one is consumed, so at most two pages are held
+        in memory at any time.
+        """
+        if self.page_size < 1:
+            raise ValueError('Page size must be greater than 0')
+
+        if not self.prefetch:
+            offset = 0
+            while True:
+                page = self._fetch_page(offset, self.page_size)
+                yield from page
+                if len(page) < self.page_size:
+                    return
+                offset += self.page_size
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            offset = 0
+            pending: Future = executor.submit(self._fetch_page, offset, self.page_size)
+            while pending is not None:
+                page = pending.result()
+                offset += self.page_size
+                pending = executor.submit(self._fetch_page, offset, self.page_size) \
+                    if len(page) == self.page_size else None
+                yield from page
+
+    def scan(self, parallelism: int = 4, raw: bool = False) -> Iterator[EntityHandle | tuple]:
+        """
+        Scans all entities with several pages requested concurrently. Pages are yielded in completion order,
+        the order of the entities is therefore not stable. At most `parallelism` pages are in flight or
+        buffered at any time.
 
+        :param parallelism: Number of pages requested concurrently
+        :param raw: Yield the (s, p, o) triples of each page instead of entity handles
+        """
+        if parallelism < 1:
+            raise ValueError('Parallelism must be greater than 0')
+        if self.page_size < 1:
+            raise ValueError('Page size must be greater than 0')
+
+        fetch = self._fetch_triples if raw else self._fetch_counted_page
+
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            offset = 0
+            exhausted = False
+            pending: Set[Future] = set()
+            while True:
+                while not exhausted and len(pending) < parallelism:
+                    pending.add(executor.submit(fetch, offset, self.page_size))
+                    offset += self.page_size
+
+                if not pending:
+                    return
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    items, count = future.result()
+                    if count < self.page_size:
+                        exhausted = True
+                    yield from items
+
+    def __getitem__(self, item) -> List[EntityHandle]:
+        """
+        Fetches a single page: the entities of a slice (e.g. [10:20]), or the first n entities for an integer n.
+        Nothing is kept, every access sends a request.
+        """
         if isinstance(item, slice):
             start = item.start or 0
             stop = item.stop or 10
@@ -39,22 +154,72 @@ class EntityIterable:
             off = 0
             lim = 10
 
+        return self._fetch_page(off, lim)
+
+    def _fetch_listing(self, offset: int, limit: int) -> dict:
         endpoint = 'api/entities'
-        params = {'limit': lim, 'offset': off}
+        params = {'limit': limit, 'offset': offset}
         headers = {'X-Application': self.application_label, 'Accept': 'application/ld+json'}
-        tmp = entitygraph._base_client.make_request('GET', endpoint, headers=headers, params=params).json()['@graph']
+        return entitygraph._base_client.make_request('GET', endpoint, headers=headers, params=params).json()
+
+    def _fetch_page(self, offset: int, limit: int) -> List[EntityHandle]:
+        if self.property_uri is not None:
+            return self._fetch_filtered_page(offset, limit)
+
+        return [self._to_handle(x) for x in self._fetch_listing(offset, limit).get('@graph', [])]
+
+    def _filter_pattern(self, offset: int = None, limit: int = None) -> str:
+        # Without offset and limit the unpaginated query, which the query statistics are aggregated under
+        pattern = f"SELECT DISTINCT ?entity WHERE {{ ?entity {sparql.term(self.property_uri)} ?value . }} " \
+                  f"ORDER BY ?entity"
+        return pattern if limit is None else f"{pattern} LIMIT {limit} OFFSET {offset}"
+
+    def _filter_triples(self, offset: int = None, limit: int = None) -> str:
+        return f"CONSTRUCT {{ ?entity ?p ?o . }} " \
+               f"WHERE {{ {{ {self._filter_pattern(offset, limit)} }} ?entity ?p ?o . }}"
 
-        for x in tmp:
-            parsed_url = urlparse(x['@id'])
-            path_parts = parsed_url.path.strip('/').split('/')
-            entity_id = path_parts[-1] if len(path_parts) > 0 else None
+    def _fetch_filtered_page(self, offset: int, limit: int) -> List[EntityHandle]:
+        # The listing endpoint cannot filter, the property is therefore pushed down as SPARQL query
+        query = entitygraph.Query()
+        query._application_label = self.application_label
+        result = query.select(self._filter_pattern(offset, limit), stats_query=self._filter_pattern())
 
-            tmp = Entity()
-            tmp._id = entity_id
-            tmp._application_label = self.application_label
-            self.cache.append(tmp)
+        if result.empty:
+            return []
 
-        return self.cache
+        return [self._identifier_to_handle(str(x)) for x in result['entity']]
+
+    def _fetch_counted_page(self, offset: int, limit: int) -> Tuple[List[EntityHandle], int]:
+        page = self._fetch_page(offset, limit)
+        return page, len(page)
+
+    def _fetch_triples(self, offset: int, limit: int) -> Tuple[List[tuple], int]:
+        if self.property_uri is not None:
+            query = entitygraph.Query()
+            query._application_label = self.application_label
+            graph = query.construct(self._filter_triples(offset, limit), stats_query=self._filter_triples())
+            return list(graph), len(set(graph.subjects(self.property_uri, None)))
+
+        from rdflib import Graph
+
+        listing = self._fetch_listing(offset, limit)
+        count = len(listing.get('@graph', []))
+        triples = list(Graph().parse(data=json.dumps(listing), format='json-ld')) if count else []
+        return triples, count
+
+    def _to_handle(self, node: dict) -> EntityHandle:
+        parsed_url = urlparse(node['@id'])
+        path_parts = parsed_url.path.strip('/').split('/')
+        entity_id = path_parts[-1] if len(path_parts) > 0 else None
+
+        return EntityHandle(entity_id, self.application_label)
+
+    def _identifier_to_handle(self, identifier: str) -> EntityHandle:
+        matched = Entity.match_internal_urn(identifier)
+        if matched:
+            return EntityHandle(matched[1], matched[0] or self.application_label)
+
+        return self._to_handle({'@id': identifier})
 
 
 class Entity:
@@ -70,22 +235,20 @@ class Entity:
         self._id: str = None
         self._application_label: str = scope
         
-        if isinstance(data, Graph):
-            self.__graph: Graph = data
+        if data is None:
+            if format not in ('turtle', 'json-ld', 'n3'):
+                raise ValueError(f"Unsupported format: {format}")
+            self.__graph: Graph = None
         else:
-            if format == 'turtle':
-                self.__graph: Graph = Graph().parse(data=data, format='turtle',
-                                                    encoding='utf-8') if data is not None else None
-            elif format == 'json-ld':
-                self.__graph: Graph = Graph().parse(data=data, format='json-ld',
-                                                    encoding='utf-8') if data is not None else None
-            elif format == 'n3':
-                self.__graph: Graph = Graph().parse(data=data, format='n3',
-                                                    encoding='utf-8') if data is not None else None
+            # rdflib is loaded on first use, entities referenced by identifier only do not need it
+            from rdflib import Graph
+
+            if isinstance(data, Graph):
+                self.__graph: Graph = data
+            elif format in ('turtle', 'json-ld', 'n3'):
+                self.__graph: Graph = Graph().parse(data=data, format=format, encoding='utf-8')
             else:
                 raise ValueError(f"Unsupported format: {format}")
-            
-    
 
     def __check_id(self):
         if not self._id:
@@ -126,22 +289,24 @@ class Entity:
     @property
     def uri(self) -> URIRef:
         self.__check_id()
+        from rdflib import URIRef
+
         base_url: str = entitygraph._base_client.base_url.rstrip("/")
         return URIRef(f"{base_url}/api/s/{self._application_label}/entities/{self._id}")
 
     def __uriref_to_prefixed(self, url: URIRef) -> str:
+        from rdflib import URIRef
+
         if not isinstance(url, URIRef):
             raise ValueError(
                 f'Invalid input "{url}". Expected a URIRef instance, e.g., URIRef("https://schema.org/name") or "SDO.name"')
 
-        url_str = str(url)
-
-        for key in namespace_map:
-            if url_str.startswith(key):
-                return url_str.replace(key, f"{namespace_map[key]}.")
+        prefixed = namespaces.get_registry().prefixed(str(url))
+        if prefixed is not None:
+            return prefixed
 
         raise ValueError(
-            f'URL "{url}" does not match any namespace in the namespace_map. Please make sure the URL is correct or update the namespace_map.')
+            f'URL "{url}" does not match any known namespace. Please make sure the URL is correct or register the namespace with entitygraph.register_namespace().')
 
     def save(self, encode=True) -> 'Entity':
         if self._id:
@@ -159,6 +324,8 @@ class Entity:
 
         # identifier = entity.json()["https://w3id.org/av360/megt#inserted"]["@id"]
 
+        from rdflib import Graph
+
         tmp = Graph().parse(data=response.text, format='turtle')
         for s, p, o in tmp:
             if 'entities' in str(s):
@@ -178,6 +345,8 @@ class Entity:
         headers = {'X-Application': self._application_label, 'Accept': 'text/turtle'}
         response: Response = entitygraph._base_client.make_request('GET', endpoint, headers=headers)
 
+        from rdflib import Graph
+
         self.__graph = Graph().parse(data=response.text, format='turtle')
         self.__updated = False
         return self
@@ -189,9 +358,33 @@ class Entity:
 
         return tmp
 
-    def get_all(self, property: URIRef = None) -> List['Entity']:
-        return EntityIterable(self._application_label,
-                              self.__uriref_to_prefixed(property) if property else None)
+    def get_all(self, property: URIRef = None, page_size: int = 100, prefetch: bool = True) -> EntityIterable:
+        """
+        Lists the entities of this application. Slicing (e.g. get_all()[0:50]) fetches a single page, iterating
+        (for e in get_all()) walks lazily through all entities.
+
+        :param property: Property (qualified URL). Only entities with a value for this property are returned, the
+                         filter is evaluated by the server
+        :param page_size: Number of entities requested per page while iterating
+        :param prefetch: Fetch the next page on a background thread while the current page is consumed
+        """
+        # The filter works for any IRI, it does not need to be in the namespace registry. Plain strings are
+        # accepted as well, the triples of raw scans are matched against the URIRef.
+        from rdflib import URIRef
+
+        return EntityIterable(self._application_label, page_size=page_size, prefetch=prefetch,
+                              property_uri=URIRef(property) if property else None)
+
+    def scan(self, parallelism: int = 4, page_size: int = 1000, raw: bool = False) -> Iterator[EntityHandle | tuple]:
+        """
+        Scans all entities of this application with concurrent page requests, e.g. for full exports.
+        Entities (or triples) are yielded in completion order, not in listing order.
+
+        :param parallelism: Number of pages requested concurrently
+        :param page_size: Number of entities requested per page
+        :param raw: Yield (s, p, o) triples instead of entity handles
+        """
+        return EntityIterable(self._application_label, page_size=page_size).scan(parallelism=parallelism, raw=raw)
 
     def delete(self) -> None:
         self.__check_id()
@@ -225,6 +418,8 @@ class Entity:
         # Convert property to prefixed version
         prefixed = self.__uriref_to_prefixed(property)
 
+        from rdflib import URIRef
+
         if isinstance(value, URIRef):
             value = '<' + str(value) + '>'
 
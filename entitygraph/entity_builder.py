@@ -1,12 +1,25 @@
 from __future__ import annotations
-from warnings import deprecated
+import functools
 import re
-from typing import List
-
-from rdflib import XSD, Graph, RDF, Literal, URIRef, BNode
+from typing import TYPE_CHECKING, List
+import warnings
 
 from entitygraph import Entity
 
+if TYPE_CHECKING:
+    from rdflib import Graph, Literal, URIRef
+
+
+def _deprecated(message: str):
+    # warnings.deprecated only exists since Python 3.13
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            warnings.warn(f"{function.__name__} is deprecated: {message}", DeprecationWarning, stacklevel=2)
+            return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
    
 
 
@@ -21,6 +34,7 @@ class EntityBuilder:
             type (URIRef, optional): The type of the new entity as URIRef. Defaults to None.
             scope (str, optional): The scope (or application) in which this . Defaults to "default".
         """
+        from rdflib import Graph, RDF, BNode
 
         self._application_label: str = scope
         self.graph = Graph()
@@ -46,12 +60,16 @@ class EntityBuilder:
         Returns:
             EntityBuilder: this
         """
+        from rdflib import RDF
+
         self.graph.add((self.node, RDF.type, type))
         
         return self
 
-    @deprecated
+    @_deprecated("use add_string_value, add_literal or link_to_node")
     def add_value(self, property: URIRef, value: str | URIRef) -> EntityBuilder: 
+        from rdflib import Literal, URIRef
+
         if isinstance(value, URIRef):
             self.graph.add((self.node, property, value))
         else:
@@ -67,20 +85,26 @@ class EntityBuilder:
     def add_string_value(self,  property: URIRef, value: str, lang = "en") -> EntityBuilder: 
         if not self._is_valid_language_tag(lang): 
             raise ValueError("Not a valid language tag: "+lang)
+
+        from rdflib import Literal
         
         self.add_literal(property, Literal(value, lang=lang))
         
         return self
     
     def add_integer_value(self,  property: URIRef, value: int) -> EntityBuilder: 
+        from rdflib import XSD, Literal
+
         self.add_literal(property, Literal(value, datatype=XSD.integer))
         return self
     
     def add_any_value(self,  property: URIRef, value: any) -> EntityBuilder: 
+        from rdflib import Literal
+
         self.add_literal(property, Literal(value))
         return self
 
-    @deprecated
+    @_deprecated("use link_to_entity")
     def add_relation(self, property: URIRef, target_entity: Entity) -> EntityBuilder: 
         self.graph.add((self.node, property, target_entity.uri))
         return self
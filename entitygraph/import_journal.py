@@ -0,0 +1,78 @@
+import json
+import os
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Tuple
+
+
+class ImportJournal:
+    """
+    Local checkpoint journal of a file import, see Admin.import_file(..., journal=...).
+
+    The journal is a JSON lines file. The first line describes the import (file, size, format, repository,
+    application and chunk size), every further line an acknowledged part by its byte range and the SHA-256 hash of its content.
+    An import rerun with the same journal skips all parts which were acknowledged and did not change since.
+    """
+
+    def __init__(self, path: Path, file_path: Path, file_mimetype: str, repository: str, application: str,
+                 chunk_size: int = None):
+        """
+        :param path: Path of the journal file, created if it does not exist
+        :param file_path: Path of the imported file
+        :param file_mimetype: The mimetype of the imported file
+        :param repository: The repository type the file is imported into
+        :param application: The label of the application the file is imported into
+        :param chunk_size: The chunk size the file is split with, None if it is imported as a whole. Parts are
+                           recorded by their byte ranges, which only match for the same chunk size
+        """
+        self.path: Path = Path(path)
+        self.header: dict = {'file': Path(file_path).name, 'size': os.path.getsize(file_path),
+                             'mimetype': file_mimetype, 'repository': repository, 'application': application,
+                             'chunk_size': chunk_size}
+        # (start, end) -> sha256
+        self._completed: Dict[Tuple[int, int], str] = {}
+        self._lock: Lock = Lock()
+
+        if self.path.exists() and self.path.stat().st_size > 0:
+            self.__load()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.__append(self.header)
+
+    def __load(self) -> None:
+        with open(self.path, 'r', encoding='utf-8') as file:
+            header = json.loads(file.readline())
+            if header != self.header:
+                raise ValueError(f"The journal {self.path} belongs to another import: {header}")
+
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Last line of an interrupted write
+                    continue
+                self._completed[(entry['start'], entry['end'])] = entry['sha256']
+
+    def __append(self, entry: dict) -> None:
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(entry) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+    def is_completed(self, start: int, end: int, sha256: str) -> bool:
+        return self._completed.get((start, end)) == sha256
+
+    def complete(self, start: int, end: int, sha256: str) -> None:
+        """
+        Records a part as acknowledged by the server
+        """
+        with self._lock:
+            self.__append({'start': start, 'end': end, 'sha256': sha256})
+            self._completed[(start, end)] = sha256
+
+    @property
+    def completed(self) -> int:
+        """
+        Number of acknowledged parts
+        """
+        return len(self._completed)
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+import json
+import logging
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Tuple
+
+from requests import Response
+
+import entitygraph
+
+if TYPE_CHECKING:
+    import pandas
+
+
+class NamespaceIndex:
+    """
+    Longest-prefix index over a namespace to prefix mapping.
+
+    Namespaces are grouped by their part up to (and including) the last '#' or '/'. A lookup only probes the
+    groups matching the separator positions of the given URI, starting with the longest, instead of testing
+    every namespace. Results are memoized per URI.
+    """
+
+    def __init__(self, namespaces: Dict[str, str] = None, cache_size: int = 4096):
+        self._buckets: Dict[str, List[Tuple[str, str]]] = {}
+        self._prefixes: Dict[str, str] = {}
+        self._cache: Dict[str, Tuple[str, str] | None] = {}
+        self._cache_size: int = cache_size
+
+        for namespace, prefix in (namespaces or {}).items():
+            self.add(namespace, prefix)
+
+    @staticmethod
+    def _split(value: str, end: int = None) -> int:
+        end = len(value) if end is None else end
+        return max(value.rfind('/', 0, end), value.rfind('#', 0, end)) + 1
+
+    def add(self, namespace: str, prefix: str) -> None:
+        """
+        Adds (or replaces) a namespace
+
+        :param namespace: The namespace, e.g. "https://schema.org/"
+        :param prefix: The prefix used for the namespace, e.g. "sdo"
+        """
+        bucket = self._buckets.setdefault(namespace[:self._split(namespace)], [])
+        for entry in bucket:
+            if entry[0] == namespace and self._prefixes.get(entry[1]) == namespace:
+                del self._prefixes[entry[1]]
+        bucket[:] = [entry for entry in bucket if entry[0] != namespace]
+        bucket.append((namespace, prefix))
+        self._prefixes[prefix] = namespace
+        bucket.sort(key=lambda entry: len(entry[0]), reverse=True)
+        self._cache.clear()
+
+    def match(self, uri: str) -> Tuple[str, str] | None:
+        """
+        Finds the longest namespace the given URI starts with
+
+        :param uri: The full URI
+        :return: A tuple with namespace and prefix, or None
+        """
+        try:
+            return self._cache[uri]
+        except KeyError:
+            pass
+
+        result = None
+        end = len(uri)
+        while result is None:
+            end = self._split(uri, end)
+            for namespace, prefix in self._buckets.get(uri[:end], ()):
+                if uri.startswith(namespace):
+                    result = (namespace, prefix)
+                    break
+            if end == 0:
+                break
+            end -= 1
+
+        if len(self._cache) >= self._cache_size:
+            self._cache.clear()
+        self._cache[uri] = result
+
+        return result
+
+    def prefixed(self, uri: str) -> str | None:
+        """
+        Converts the given URI into its prefixed form, e.g. "https://schema.org/name" into "sdo.name"
+
+        :param uri: The full URI
+        :return: The prefixed name, or None if no namespace matches
+        """
+        matched = self.match(uri)
+        if matched is None:
+            return None
+
+        return f"{matched[1]}.{uri[len(matched[0]):]}"
+
+    def compact(self, uri: str, separator: str = ':') -> str:
+        """
+        Converts the given URI into a CURIE, e.g. "https://schema.org/name" into "sdo:name". URIs without a
+        matching namespace are returned unchanged.
+        """
+        matched = self.match(uri)
+        if matched is None:
+            return uri
+
+        return f"{matched[1]}{separator}{uri[len(matched[0]):]}"
+
+    def expand(self, curie: str, separator: str = ':') -> str:
+        """
+        Converts the given CURIE into a full URI, e.g. "sdo:name" into "https://schema.org/name". Values with an
+        unknown prefix (or full URIs) are returned unchanged.
+        """
+        prefix, found, local = curie.partition(separator)
+        if not found or local.startswith('//'):
+            return curie
+
+        namespace = self._prefixes.get(prefix)
+        if namespace is None:
+            return curie
+
+        return namespace + local
+
+    def compact_series(self, series: pandas.Series, separator: str = ':') -> pandas.Series:
+        """
+        Compacts all URIs in the series. Each distinct value is converted only once.
+        """
+        return series.map({value: self.compact(value, separator) if isinstance(value, str) else value
+                           for value in series.dropna().unique()})
+
+    def expand_series(self, series: pandas.Series, separator: str = ':') -> pandas.Series:
+        """
+        Expands all CURIEs in the series. Each distinct value is converted only once.
+        """
+        return series.map({value: self.expand(value, separator) if isinstance(value, str) else value
+                           for value in series.dropna().unique()})
+
+    def compact_triples(self, triples: Iterable[tuple], separator: str = ':') -> Iterator[tuple]:
+        """
+        Compacts the URIs of a triple (or quad) stream. Literals and blank nodes are passed through.
+        """
+        from rdflib import URIRef
+
+        for statement in triples:
+            yield tuple(self.compact(term, separator) if isinstance(term, URIRef) else term for term in statement)
+
+    def expand_triples(self, triples: Iterable[tuple], separator: str = ':') -> Iterator[tuple]:
+        """
+        Expands the CURIEs of a triple (or quad) stream into URIRefs. Other terms are passed through.
+        """
+        for statement in triples:
+            yield tuple(self.__expand_term(term, separator) for term in statement)
+
+    def __expand_term(self, term, separator: str):
+        if type(term) is not str:
+            return term
+
+        from rdflib import URIRef
+
+        expanded = self.expand(term, separator)
+        return URIRef(expanded) if expanded is not term else term
+
+
+class NamespaceRegistry(NamespaceIndex):
+    """
+    Runtime registry of namespaces. Starts from the built-in namespace_map, accepts user registrations and can
+    be synced with the prefixes declared by the server. Synced prefixes can be cached on disk, so that new
+    processes start without a network call.
+    """
+    # Format 1 caches may contain the prefixes rdflib binds by default, not declared by the server
+    CACHE_FORMAT: int = 2
+
+    def __init__(self, namespaces: Dict[str, str] = None, cache_size: int = 4096):
+        super().__init__(namespaces, cache_size)
+        self.synced: Dict[str, str] = {}
+
+    def register(self, namespace: str, prefix: str) -> 'NamespaceRegistry':
+        """
+        Registers a namespace, e.g. registry.register("https://example.com/vocab#", "ex")
+
+        :param namespace: The namespace
+        :param prefix: The prefix, must be known to the server as well
+        """
+        self.add(namespace, prefix)
+        return self
+
+    def sync(self, cache_path: Path = None) -> 'NamespaceRegistry':
+        """
+        Registers the prefixes declared by the connected server. If a cache file is given and was written for
+        the same host and client version, its content is used instead of asking the server. Otherwise the
+        server is asked and the cache file is (re)written.
+
+        :param cache_path: Optional path of the cache file
+        """
+        if cache_path and self.load(cache_path):
+            return self
+
+        if entitygraph._base_client is None:
+            raise Exception(
+                "Not connected. Please connect using entitygraph.connect(api_key=..., host=...) before syncing namespaces")
+
+        endpoint = 'api/entities'
+        params = {'limit': 1, 'offset': 0}
+        headers = {'Accept': 'text/turtle'}
+        response: Response = entitygraph._base_client.make_request('GET', endpoint, headers=headers, params=params)
+
+        from rdflib import Graph
+
+        # Without bind_namespaces rdflib adds its own default prefixes (brick, csvw, geo, ...) to the parsed ones
+        for prefix, namespace in Graph(bind_namespaces='none').parse(data=response.text, format='turtle').namespaces():
+            if prefix:
+                self.synced[str(namespace)] = prefix
+                self.add(str(namespace), prefix)
+
+        if cache_path:
+            self.save(cache_path)
+
+        return self
+
+    def __stamp(self) -> dict:
+        return {'format': self.CACHE_FORMAT,
+                'version': entitygraph.__version__,
+                'host': entitygraph._base_client.base_url if entitygraph._base_client else None}
+
+    def save(self, cache_path: Path) -> None:
+        """
+        Writes the synced namespaces with a version stamp into the cache file
+        """
+        content = dict(self.__stamp(), synced_at=datetime.now(timezone.utc).isoformat(), namespaces=self.synced)
+        Path(cache_path).write_text(json.dumps(content), encoding='utf-8')
+
+    def load(self, cache_path: Path) -> bool:
+        """
+        Registers the namespaces from the cache file, if it exists and matches the current host and version
+
+        :return: True if the cache file was used
+        """
+        try:
+            content = json.loads(Path(cache_path).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return False
+
+        if any(content.get(key) != value for key, value in self.__stamp().items()):
+            logging.debug(f"Ignoring outdated namespace cache {cache_path}")
+            return False
+
+        for namespace, prefix in content.get('namespaces', {}).items():
+            self.synced[namespace] = prefix
+            self.add(namespace, prefix)
+
+        return True
+
+
+_registry: NamespaceRegistry = None
+_registry_lock: Lock = Lock()
+
+
+def get_registry() -> NamespaceRegistry:
+    """
+    Returns the global registry. The built-in namespace map is large, it is therefore only loaded on first use.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from entitygraph.namespace_map import namespace_map
+                _registry = NamespaceRegistry(namespace_map)
+
+    return _registry
+
+
+def __getattr__(name: str):
+    if name == 'registry':
+        return get_registry()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def compact(values: pandas.Series | Iterable[tuple], separator: str = ':') -> pandas.Series | Iterator[tuple]:
+    """
+    Compacts full URIs into CURIEs with the namespaces of the registry
+
+    :param values: A pandas Series (e.g. a column returned by Query.select) or an iterable of triples
+    :param separator: Separator between prefix and local name
+    """
+    import pandas
+
+    if isinstance(values, pandas.Series):
+        return get_registry().compact_series(values, separator)
+
+    return get_registry().compact_triples(values, separator)
+
+
+def expand(values: pandas.Series | Iterable[tuple], separator: str = ':') -> pandas.Series | Iterator[tuple]:
+    """
+    Expands CURIEs into full URIs with the namespaces of the registry
+
+    :param values: A pandas Series or an iterable of triples
+    :param separator: Separator between prefix and local name
+    """
+    import pandas
+
+    if isinstance(values, pandas.Series):
+        return get_registry().expand_series(values, separator)
+
+    return get_registry().expand_triples(values, separator)
@@ -0,0 +1,139 @@
+import re
+import sys
+from typing import Dict, Iterable, Iterator, Tuple
+
+_IRI = r'<[^>]*>'
+_BNODE = r'_:[^\s.]+(?:\.[^\s.]+)*'
+_LITERAL = r'"(?:[^"\\]|\\.)*"(?:@[a-zA-Z]+(?:-[a-zA-Z0-9]+)*|\^\^<[^>]*>)?'
+
+_STATEMENT = re.compile(rf'[ \t]*({_IRI}|{_BNODE})[ \t]+({_IRI})[ \t]+({_IRI}|{_BNODE}|{_LITERAL})[ \t]*\.[ \t]*(?:#.*)?')
+_LITERAL_PARTS = re.compile(r'"((?:[^"\\]|\\.)*)"(?:@([a-zA-Z]+(?:-[a-zA-Z0-9]+)*)|\^\^<([^>]*)>)?', re.DOTALL)
+_ESCAPE = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))')
+_ESCAPES = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+
+
+def _unescape_match(match: re.Match) -> str:
+    if match.group(3) is not None:
+        return _ESCAPES.get(match.group(3), match.group(3))
+    return chr(int(match.group(1) or match.group(2), 16))
+
+
+def unescape(value: str) -> str:
+    """
+    Resolves the escape sequences (e.g. \\n or \\u00E4) of an N-Triples string or IRI
+    """
+    return _ESCAPE.sub(_unescape_match, value) if '\\' in value else value
+
+
+class NTriplesParser:
+    """
+    Fast line based N-Triples parser, which skips everything rdflib needs to build a Graph.
+
+    With terms='nt' the statements are tuples of the N-Triples tokens as they appear in the source, e.g.
+    ('<https://example.org/a>', '<https://schema.org/name>', '"A"@en'), with IRIs interned. With terms='rdflib'
+    they are rdflib terms, IRIs are cached and blank node labels are consistent for the lifetime of the parser.
+    """
+
+    def __init__(self, terms: str = 'rdflib', cache_size: int = 100000):
+        if terms not in ('nt', 'rdflib'):
+            raise ValueError(f"Unsupported terms: {terms}")
+
+        self.terms: str = terms
+        self._cache_size: int = cache_size
+        self._iris: Dict[str, object] = {}
+        self._bnodes: Dict[str, object] = {}
+
+        if terms == 'rdflib':
+            from rdflib import BNode, Literal, URIRef
+            self._terms = (URIRef, Literal, BNode)
+
+    def parse_line(self, line: str) -> Tuple | None:
+        """
+        Parses a single line
+
+        :return: The statement, or None for empty lines and comments
+        """
+        matched = _STATEMENT.fullmatch(line.rstrip('\r\n'))
+        if matched is None:
+            if not line.strip() or line.lstrip().startswith('#'):
+                return None
+            raise ValueError(f"Invalid N-Triples line: {line!r}")
+
+        s, p, o = matched.groups()
+        if self.terms == 'nt':
+            return sys.intern(s), sys.intern(p), sys.intern(o) if o[0] == '<' else o
+
+        return self.__node(s), self.__iri(p), self.__node(o)
+
+    def parse(self, lines: Iterable[str | bytes]) -> Iterator[Tuple]:
+        """
+        Parses the lines (e.g. of a file or a streamed response) and yields the statements
+        """
+        for line in lines:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            statement = self.parse_line(line)
+            if statement is not None:
+                yield statement
+
+    def __iri(self, token: str):
+        iri = self._iris.get(token)
+        if iri is None:
+            if len(self._iris) >= self._cache_size:
+                self._iris.clear()
+            iri = self._iris[token] = self._terms[0](unescape(token[1:-1]))
+        return iri
+
+    def __node(self, token: str):
+        if token[0] == '<':
+            return self.__iri(token)
+
+        if token[0] == '_':
+            node = self._bnodes.get(token)
+            if node is None:
+                node = self._bnodes[token] = self._terms[2]()
+            return node
+
+        value, language, datatype = _LITERAL_PARTS.fullmatch(token).groups()
+        return self._terms[1](unescape(value), lang=language,
+                              datatype=self.__iri(f"<{datatype}>") if datatype else None)
+
+
+def _escape(value: str) -> str:
+    if '\\' in value:
+        value = value.replace('\\', '\\\\')
+    if '"' in value:
+        value = value.replace('"', '\\"')
+    if '\n' in value or '\r' in value:
+        value = value.replace('\n', '\\n').replace('\r', '\\r')
+    return value
+
+
+def serialize(triples: Iterable[Tuple], batch_size: int = 10000) -> Iterator[bytes]:
+    """
+    Serializes rdflib triples (e.g. a Graph) to N-Triples incrementally, yielding UTF-8 encoded batches of at
+    most batch_size statements. Blank node labels are consistent across all batches.
+    """
+    from rdflib import BNode, Literal, URIRef
+
+    def term(node) -> str:
+        if isinstance(node, Literal):
+            if node.language:
+                return f'"{_escape(str(node))}"@{node.language}'
+            if node.datatype:
+                return f'"{_escape(str(node))}"^^<{node.datatype}>'
+            return f'"{_escape(str(node))}"'
+        if isinstance(node, URIRef):
+            return f'<{node}>'
+        if isinstance(node, BNode):
+            return f'_:{node}'
+        raise ValueError(f"Cannot serialize {node!r} as N-Triples term")
+
+    batch = []
+    for s, p, o in triples:
+        batch.append(f'{term(s)} {term(p)} {term(o)} .\n')
+        if len(batch) >= batch_size:
+            yield ''.join(batch).encode('utf-8')
+            batch = []
+    if batch:
+        yield ''.join(batch).encode('utf-8')
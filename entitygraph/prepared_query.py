@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterator, List
+
+from entitygraph import sparql, sparql_results
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+    from entitygraph.query import Query
+
+
+def _key(term: sparql_results.Term | None) -> sparql_results.Term | None:
+    # Plain literals are typed as xsd:string (or rdf:langString) by some servers, language tags are case-insensitive
+    if term is None:
+        return None
+    kind, value, datatype, language = term
+    if datatype in (sparql_results.XSD + 'string', sparql_results.RDF + 'langString'):
+        datatype = None
+    return kind, value, datatype, language.lower() if language else None
+
+
+class PreparedQuery:
+    """
+    A SELECT query template with parameters, created with Query.prepare().
+
+    Parameters are variables of the template, e.g. '?subject' in 'SELECT ?name WHERE { ?subject sdo:name ?name }'.
+    They are bound with an escaped VALUES block, never by string substitution. execute_many() binds many
+    parameter sets at once, with as many sets per request as the size limits allow, and splits the combined
+    result back per parameter set. Results are typed as those of Query.select(result_format='json').
+    """
+
+    def __init__(self, query: Query, template: str, max_request_bytes: int = 32 * 1024, max_rows: int = 1000):
+        """
+        :param query: The Query used to execute the template
+        :param template: The SPARQL SELECT query
+        :param max_request_bytes: Maximum size of a single request
+        :param max_rows: Maximum number of parameter sets bound in a single request
+        """
+        self.query: Query = query
+        self.template: str = template
+        self.max_request_bytes: int = max_request_bytes
+        self.max_rows: int = max_rows
+
+    def bind(self, params: List[Dict[str, object]], names: List[str] = None) -> str:
+        """
+        Returns the query with all given parameter sets bound
+
+        :param params: Parameter sets, e.g. [{'subject': URIRef("https://example.org/a")}]
+        :param names: The parameter names, defaults to all names used in the parameter sets
+        """
+        names = names or self.__names(params)
+        return sparql.bind_values(self.template, names, [[values.get(name) for name in names] for values in params])
+
+    def execute(self, repository: str = "entities", **params) -> DataFrame:
+        """
+        Executes the template with a single parameter set, e.g. prepared.execute(subject=URIRef("..."))
+        """
+        return self.execute_many([params], repository)[0]
+
+    def execute_many(self, params: List[Dict[str, object]], repository: str = "entities") -> List[DataFrame]:
+        """
+        Executes the template for all parameter sets, with as few requests as possible. Templates with a LIMIT or
+        OFFSET clause are executed once per parameter set, since the clause would apply to all sets of a request.
+
+        :param params: Parameter sets, all with the same names
+        :param repository: The repository type in which the query should search: entities, schema, transactions or application
+        :return: One DataFrame per parameter set, in order of the parameter sets
+        """
+        names = self.__names(params)
+        sliced = sparql.is_sliced(self.template)
+        keys = [tuple(_key(sparql.result_term(values.get(name))) for name in names) for values in params]
+        results: List[DataFrame] = [None] * len(params)
+
+        for batch in self.__batches(names, params, 1 if sliced else self.max_rows):
+            content = self.query._post("api/query/select", self.bind([params[index] for index in batch], names),
+                                       repository, 'application/sparql-results+json')
+            variables, rows = sparql_results.parse_json(content) if content else ([], [])
+            df = sparql_results.to_dataframe(variables, rows)
+            if sliced:
+                results[batch[0]] = df
+                continue
+
+            # Results are related to their parameters by the complete RDF terms, as in the JSON results
+            positions: Dict[tuple, List[int]] = {}
+            for position, row in enumerate(rows):
+                positions.setdefault(tuple(_key(row.get(name)) for name in names), []).append(position)
+            for index in batch:
+                results[index] = df.iloc[positions.get(keys[index], [])].reset_index(drop=True)
+
+        return results
+
+    @staticmethod
+    def __names(params: List[Dict[str, object]]) -> List[str]:
+        names = []
+        for values in params:
+            for name in values:
+                if name not in names:
+                    names.append(name)
+        if not names:
+            raise ValueError("At least one parameter is required")
+        return names
+
+    def __batches(self, names: List[str], params: List[Dict[str, object]], max_rows: int) -> Iterator[List[int]]:
+        # Indices of the parameter sets bound in each request
+        base = len(self.bind(params[:1], names).encode())
+        size = base
+        batch = []
+        for index, values in enumerate(params):
+            row = len(('(' + ' '.join(sparql.term(values.get(name)) for name in names) + ') ').encode())
+            if batch and (size + row > self.max_request_bytes or len(batch) >= max_rows):
+                yield batch
+                size = base
+                batch = []
+            batch.append(index)
+            size += row
+        if batch:
+            yield batch
@@ -1,45 +1,568 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+import csv
 import io
+import json
+from itertools import islice
+import logging
+from pathlib import Path
+import time
+from threading import Lock, local
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Tuple, TypeVar
 
-import pandas
-from pandas import DataFrame
-from rdflib import Graph
 from requests import Response
 
 import entitygraph
+from entitygraph import sparql, sparql_results
+from entitygraph.ntriples import NTriplesParser
+from entitygraph.prepared_query import PreparedQuery
+from entitygraph.query_stats import QueryStats
+from entitygraph.update_batcher import UpdateBatcher
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+    from rdflib import Graph
+    from rdflib.store import Store
+
+RESULT_FORMATS = {'csv': 'text/csv',
+                  'json': 'application/sparql-results+json',
+                  'tsv': 'text/tab-separated-values'}
+
+T = TypeVar('T')
+
+
+def _retrying(fetch: Callable[[], T], retries: int) -> T:
+    for attempt in range(retries + 1):
+        try:
+            return fetch()
+        except Exception as err:
+            if attempt == retries:
+                raise
+            logging.debug(f"Query page failed ({err}), retrying ({attempt + 1}/{retries})")
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def _paged(fetch: Callable[[int], T], is_last: Callable[[T], bool], parallelism: int, retries: int,
+           pages: int = None) -> Iterator[T]:
+    # Fetches the pages 0, 1, 2, ... (up to the number of pages, if known) with up to `parallelism` requests in
+    # flight and yields them in order
+    if parallelism < 1:
+        raise ValueError('Parallelism must be greater than 0')
+
+    with ThreadPoolExecutor(max_workers=parallelism) as executor:
+        pending: Dict[int, Future] = {}
+        next_page = 0
+        page = 0
+        try:
+            while pages is None or page < pages:
+                while len(pending) < parallelism and (pages is None or next_page < pages):
+                    pending[next_page] = executor.submit(_retrying, lambda number=next_page: fetch(number), retries)
+                    next_page += 1
+
+                result = pending.pop(page).result()
+                yield result
+                if is_last(result):
+                    return
+                page += 1
+        finally:
+            for future in pending.values():
+                future.cancel()
+
+
+class QueryBatch:
+    """
+    Results of Query.select_many(). Results and durations are in order of the queries, failed queries have
+    their exception as result.
+    """
+
+    def __init__(self, size: int):
+        self.results: List[DataFrame | Exception] = [None] * size
+        self.durations: List[float] = [0.0] * size
+        self.completed: List[int] = []
+        self.elapsed: float = 0.0
+
+    @property
+    def errors(self) -> Dict[int, Exception]:
+        return {index: result for index, result in enumerate(self.results) if isinstance(result, Exception)}
+
+    @property
+    def total(self) -> float:
+        """
+        Sum of the durations of all queries, i.e. the time they would have taken one after another
+        """
+        return sum(self.durations)
+
+    def __str__(self):
+        return f"QueryBatch(queries={len(self.results)}, errors={len(self.errors)}, elapsed={self.elapsed:.3f}s, total={self.total:.3f}s)"
 
 
 class Query:
+    _executor: ThreadPoolExecutor = None
+    _executor_lock: Lock = Lock()
+    _max_workers: int = 8
+
     def __init__(self):
         if entitygraph._base_client is None:
             raise Exception(
                 "Not connected. Please connect using entitygraph.connect(api_key=..., host=...) before using Query()")
 
         self._application_label: str = "default"
+        self._local = local()
+
+    @property
+    def last_stats(self) -> QueryStats | None:
+        """
+        Statistics of the last select(), construct() or ask() called in the current thread. Windows of paginated
+        queries are only recorded in the QueryStatsRegistry passed to entitygraph.connect(), if any, aggregated
+        under the unpaginated query.
+        """
+        return getattr(self._local, 'stats', None)
+
+    def _record(self, stats: QueryStats) -> None:
+        self._local.stats = stats
+        if entitygraph._base_client.query_stats is not None:
+            entitygraph._base_client.query_stats.record(stats)
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(str(stats))
+
+    def _post(self, endpoint: str, query: str, repository: str, accept: str, cache: bool = True,
+              timeout: float = None, stats: QueryStats = None) -> bytes:
+        query_cache = entitygraph._base_client.query_cache if cache else None
+        if query_cache is not None:
+            key = query_cache.key(entitygraph._base_client.base_url, query, repository, self._application_label, accept)
+            content = query_cache.get(key, self._application_label)
+            if content is not None:
+                if stats is not None:
+                    stats.cached = True
+                return content
+            generation = query_cache.generation
+
+        params = {'repository': repository}
+        headers = {'X-Application': self._application_label, 'Content-Type': 'text/plain', 'Accept': accept}
+        start = time.perf_counter()
+        # With a timeout the response is streamed, so the transfer can be abandoned once the time is up
+        response: Response = entitygraph._base_client.make_request('POST', endpoint, headers=headers, params=params,
+                                                                   data=query, stream=timeout is not None,
+                                                                   timeout=timeout)
+        content = response.content if timeout is None else self._read(response, start + timeout)
+        if stats is not None:
+            stats.record_response(response, content, time.perf_counter() - start)
+
+        if query_cache is not None:
+            query_cache.put(key, self._application_label, content, generation)
+
+        return content
+
+    @staticmethod
+    def _read(response: Response, deadline: float) -> bytes:
+        # The timeout of requests only limits each socket operation (connecting and every single read), a slowly
+        # sent result could take arbitrarily long. The deadline is checked between the received chunks.
+        chunks = []
+        with response:
+            # urllib3 >= 2 returns whatever was received, iter_content waits until the chunk is full
+            if hasattr(response.raw, 'read1'):
+                received = iter(lambda: response.raw.read1(64 * 1024, decode_content=True), b'')
+            else:
+                received = response.iter_content(64 * 1024)
+            for chunk in received:
+                if time.perf_counter() > deadline:
+                    raise TimeoutError(f"Query did not complete within its timeout, {len(chunks)} chunks received")
+                chunks.append(chunk)
+        return b''.join(chunks)
 
-    def select(self, query: str, repository: str = "entities") -> DataFrame:
+    def select(self, query: str, repository: str = "entities", result_format: str = "csv",
+               output: str = "pandas", cache: bool = True, page_size: int = None, parallelism: int = 4,
+               retries: int = 2, timeout: float = None, stats_query: str = None) -> DataFrame:
         """
         :param query: SPARQL query. For example: 'SELECT ?entity  ?type WHERE { ?entity a ?type } LIMIT 100'
         :param repository: The repository type in which the query should search: entities, schema, transactions or application
+        :param result_format: csv (column types are guessed by pandas), json or tsv. With json and tsv the columns are typed by the RDF terms: IRIs as categoricals, xsd numbers, booleans and dates as numeric, boolean and datetime columns, language tags in an additional '{variable}_lang' column
+        :param output: pandas, arrow (pyarrow.Table) or polars (polars.DataFrame)
+        :param cache: Use the query cache configured with entitygraph.connect(), if any
+        :param page_size: Fetch the result in windows of this size (see select_pages), and concatenate them
+        :param parallelism: Number of windows fetched concurrently if a page size is given
+        :param retries: Number of retries for each failed window if a page size is given
+        :param timeout: Seconds the query may take, including receiving the result, before it fails with a TimeoutError. Checked while the result is received, a single network read may exceed it by up to the timeout. With a page size it applies to each window
+        :param stats_query: The query the statistics are aggregated under (see last_stats), defaults to the query
+        :return: The result, the timings of the query are available as last_stats afterwards
+        """
+        if result_format not in RESULT_FORMATS:
+            raise ValueError(f"Unsupported result format: {result_format}")
+
+        # pandas is imported on first use, it noticeably slows down importing the client
+        import pandas
+
+        if page_size:
+            self._local.stats = None
+            pages = list(self.select_pages(query, repository, page_size, parallelism, retries, result_format, cache,
+                                           timeout))
+            df = pandas.concat(pages, ignore_index=True) if len(pages) > 1 else pages[0]
+            return sparql_results.convert(df, output)
+
+        stats = QueryStats(stats_query or query, repository, "api/query/select")
+        content = self._post("api/query/select", query, repository, RESULT_FORMATS[result_format], cache, timeout,
+                             stats)
+
+        start = time.perf_counter()
+        if not content:
+            df = pandas.DataFrame()
+        elif result_format == 'json':
+            df = sparql_results.to_dataframe(*sparql_results.parse_json(content))
+        elif result_format == 'tsv':
+            df = sparql_results.to_dataframe(*sparql_results.parse_tsv(content))
+        else:
+            df = pandas.read_csv(io.BytesIO(content))
+        df = sparql_results.convert(df, output)
+
+        stats.parse_time = time.perf_counter() - start
+        stats.count = len(df)
+        self._record(stats)
+
+        return df
+
+    @classmethod
+    def _shared_executor(cls) -> ThreadPoolExecutor:
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=cls._max_workers, thread_name_prefix='entitygraph-query')
+            return cls._executor
+
+    @classmethod
+    def set_max_workers(cls, max_workers: int) -> None:
+        """
+        Sets the number of queries run at the same time by submit(), 8 by default. Queries submitted before still
+        run on the previous executor.
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be greater than 0')
+
+        with cls._executor_lock:
+            cls._max_workers = max_workers
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=False)
+                cls._executor = None
+
+    def submit(self, query: str, repository: str = "entities", timeout: float = None, **kwargs) -> Future:
+        """
+        Runs a SELECT query in the background, on an executor shared by all queries (see set_max_workers)
+
+        :param query: SPARQL query
+        :param repository: The repository type in which the query should search: entities, schema, transactions or application
+        :param timeout: Seconds the query may take once it started running, including receiving the result (see select). The future then fails with a TimeoutError
+        :param kwargs: Further arguments of select(), e.g. result_format
+        :return: A future of the DataFrame
+        """
+        return self._shared_executor().submit(self.select, query, repository, timeout=timeout, **kwargs)
+
+    def select_many(self, queries: List[str], repository: str = "entities", max_workers: int = 8,
+                    timeout: float = None, on_result: Callable[[int, DataFrame | Exception], None] = None,
+                    deadline: float = None, **kwargs) -> QueryBatch:
+        """
+        Runs independent SELECT queries concurrently, so the total time is close to the one of the slowest query.
+
+        :param queries: SPARQL queries
+        :param repository: The repository type in which the queries should search: entities, schema, transactions or application
+        :param max_workers: Maximum number of queries running at the same time
+        :param timeout: Seconds each query may take, including receiving the result (see select)
+        :param on_result: Called with the index and the result (or exception) of each query, in completion order
+        :param deadline: Seconds the whole batch may take. Queries not completed by then have a TimeoutError as result, queries still running are abandoned and their results discarded
+        :param kwargs: Further arguments of select(), e.g. result_format
+        """
+        batch = QueryBatch(len(queries))
+        start = time.perf_counter()
+        end = start + deadline if deadline is not None else None
+        started: Dict[int, float] = {}
+
+        def run(index: int) -> Tuple[DataFrame | Exception, float]:
+            began = started[index] = time.perf_counter()
+            try:
+                query_timeout = timeout
+                if end is not None:
+                    # Queries started late get the remaining time of the batch
+                    query_timeout = end - began if timeout is None else min(timeout, end - began)
+                    if query_timeout <= 0:
+                        raise TimeoutError(f"Query {index} was not started before the deadline of the batch")
+                result = self.select(queries[index], repository, timeout=query_timeout, **kwargs)
+            except Exception as err:
+                result = err
+            return result, time.perf_counter() - began
+
+        def complete(index: int, result: DataFrame | Exception, duration: float) -> None:
+            batch.results[index] = result
+            batch.durations[index] = duration
+            batch.completed.append(index)
+            if on_result:
+                on_result(index, result)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = {executor.submit(run, index): index for index in range(len(queries))}
+        try:
+            for future in as_completed(futures, timeout=None if end is None else max(end - time.perf_counter(), 0)):
+                complete(futures[future], *future.result())
+        except FutureTimeoutError:
+            now = time.perf_counter()
+            pending = set(range(len(queries))) - set(batch.completed)
+            for future, index in futures.items():
+                if index not in pending:
+                    continue
+                if future.done() and not future.cancelled():
+                    complete(index, *future.result())
+                else:
+                    future.cancel()
+                    complete(index, TimeoutError(f"Query {index} did not complete within the deadline of {deadline}s"),
+                             now - started.get(index, now))
+        finally:
+            # Without a deadline all queries have completed, with one the remaining ones are not waited for
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=end is None)
+        batch.elapsed = time.perf_counter() - start
+
+        logging.debug(str(batch))
+        return batch
+
+    def ask(self, query: str, repository: str = "entities", cache: bool = True) -> bool:
+        """
+        :param query: SPARQL query. For example: 'ASK { ?s a <https://schema.org/Person> }'
+        :param repository: The repository type in which the query should search: entities, schema, transactions or application
+        :param cache: Use the query cache configured with entitygraph.connect(), if any
+        """
+        stats = QueryStats(query, repository, "api/query/ask")
+        content = self._post("api/query/ask", query, repository, 'application/sparql-results+json', cache,
+                             stats=stats)
+
+        start = time.perf_counter()
+        try:
+            answer = bool(json.loads(content)['boolean'])
+        except (ValueError, KeyError, TypeError):
+            # Plain text answer
+            answer = content.strip().lower() == b'true'
+
+        stats.parse_time = time.perf_counter() - start
+        stats.count = 1
+        self._record(stats)
+
+        return answer
+
+    def update(self, update: str, repository: str = "entities") -> Response:
+        """
+        :param update: SPARQL update. For example: 'INSERT DATA { <urn:a> <urn:b> "c" }'
+        :param repository: The repository type which should be updated: entities, schema, transactions or application
+        """
+        endpoint = "api/query/update"
+        params = {'repository': repository}
+        headers = {'X-Application': self._application_label, 'Content-Type': 'text/plain'}
+        return entitygraph._base_client.make_request('POST', endpoint, headers=headers, params=params, data=update)
+
+    def batcher(self, repository: str = "entities", max_bytes: int = 256 * 1024, max_statements: int = 5000,
+                max_concurrency: int = 4) -> UpdateBatcher:
+        """
+        Creates a batcher, which merges many small inserts and deletes into few combined update requests.
+        For example: with query.batcher() as batch: batch.insert(graph)
+
+        :param repository: The repository type which should be updated: entities, schema, transactions or application
+        :param max_bytes: Maximum size of a single request
+        :param max_statements: Maximum number of statements in a single request
+        :param max_concurrency: Maximum number of requests sent at the same time
+        """
+        return UpdateBatcher(self, repository, max_bytes, max_statements, max_concurrency)
+
+    def prepare(self, template: str, max_request_bytes: int = 32 * 1024, max_rows: int = 1000) -> PreparedQuery:
+        """
+        Prepares a SELECT query template, whose variables can be bound safely and in batches.
+        For example: query.prepare('SELECT ?name WHERE { ?subject sdo:name ?name }').execute_many([{'subject': ...}, ...])
+
+        :param template: SPARQL SELECT query
+        :param max_request_bytes: Maximum size of a single request
+        :param max_rows: Maximum number of parameter sets bound in a single request
+        """
+        return PreparedQuery(self, template, max_request_bytes, max_rows)
+
+    def select_pages(self, query: str, repository: str = "entities", page_size: int = 10000, parallelism: int = 4,
+                     retries: int = 2, result_format: str = "csv", cache: bool = True,
+                     timeout: float = None) -> Iterator[DataFrame]:
+        """
+        Fetches the result of a large SELECT query in windows. The query is rewritten with ORDER BY (if missing),
+        LIMIT and OFFSET clauses, the windows are fetched concurrently and yielded in order. A failed window is
+        retried on its own.
+
+        :param query: SPARQL query without LIMIT or OFFSET clause
+        :param repository: The repository type in which the query should search: entities, schema, transactions or application
+        :param page_size: Number of rows per window
+        :param parallelism: Number of windows fetched concurrently
+        :param retries: Number of retries for each failed window
+        :param result_format: csv, json or tsv (see select)
+        :param cache: Use the query cache configured with entitygraph.connect(), if any
+        :param timeout: Seconds each window may take (see select)
+        """
+        def fetch(page: int) -> DataFrame:
+            return self.select(sparql.paginate(query, page_size, page * page_size), repository,
+                               result_format=result_format, cache=cache, timeout=timeout, stats_query=query)
+
+        return _paged(fetch, lambda df: len(df) < page_size, parallelism, retries)
+
+    def select_iter(self, query: str, repository: str = "entities", chunksize: int = 10000,
+                    rows: bool = False) -> Iterator[DataFrame | tuple]:
+        """
+        Streams the result of a SELECT query. The response is read incrementally, memory usage is bounded by the
+        chunk size and independent of the size of the result. Rows are yielded as soon as they are received,
+        DataFrame chunks are parsed from blocks of 256 KB of the response. Stopping the iteration early closes the
+        connection.
+
+        :param query: SPARQL query. For example: 'SELECT ?entity  ?type WHERE { ?entity a ?type }'
+        :param repository: The repository type in which the query should search: entities, schema, transactions or application
+        :param chunksize: Number of rows per DataFrame chunk
+        :param rows: Yield plain row tuples (all values as strings) instead of DataFrame chunks
         """
         endpoint = "api/query/select"
         params = {'repository': repository}
         headers = {'X-Application': self._application_label, 'Content-Type': 'text/plain', 'Accept': 'text/csv'}
-        response: Response = entitygraph._base_client.make_request('POST', endpoint, headers=headers, params=params, data=query)
+        response: Response = entitygraph._base_client.make_request('POST', endpoint, headers=headers, params=params,
+                                                                   data=query, stream=True)
 
-        if response.content: 
-            return pandas.read_csv(io.BytesIO(response.content))
-        else: 
-            return pandas.DataFrame()
+        with response:
+            response.raw.decode_content = True
+            response.raw.auto_close = False
+            if rows:
+                reader = csv.reader(io.TextIOWrapper(response.raw, encoding='utf-8', newline=''))
+                next(reader, None)
+                for row in reader:
+                    yield tuple(row)
+                return
 
-    def construct(self, query: str, repository: str = "entities") -> Graph:
+            import pandas
+
+            try:
+                with pandas.read_csv(response.raw, chunksize=chunksize) as chunks:
+                    yield from chunks
+            except pandas.errors.EmptyDataError:
+                return
+
+    def construct(self, query: str, repository: str = "entities", cache: bool = True, page_size: int = None,
+                  parallelism: int = 4, retries: int = 2, stats_query: str = None) -> Graph:
         """
         :param query: SPARQL query. For example: 'CONSTRUCT WHERE { ?s ?p ?o . } LIMIT 100'
         :param repository: The repository type in which the query should search: entities, schema, transactions or application
-        :param response_format: text/turtle or application/ld+json
+        :param cache: Use the query cache configured with entitygraph.connect(), if any
+        :param page_size: Fetch the result in windows of this many solutions (see construct_pages), and merge them
+        :param parallelism: Number of windows fetched concurrently if a page size is given
+        :param retries: Number of retries for each failed window if a page size is given
+        :param stats_query: The query the statistics are aggregated under (see last_stats), defaults to the query
         """
+        if page_size:
+            self._local.stats = None
+            from rdflib import Graph
+
+            # Graph.__add__ copies both graphs, the pages are added in place instead
+            graph = Graph()
+            for page in self.construct_pages(query, repository, page_size, parallelism, retries, cache):
+                graph += page
+            return graph
+
+        stats = QueryStats(stats_query or query, repository, "api/query/construct")
+        content = self._post("api/query/construct", query, repository, 'text/turtle', cache, stats=stats)
+
+        from rdflib import Graph
+
+        start = time.perf_counter()
+        graph = Graph().parse(data=content.decode('utf-8'), format='turtle')
+
+        stats.parse_time = time.perf_counter() - start
+        stats.count = len(graph)
+        self._record(stats)
+
+        return graph
+
+    def construct_pages(self, query: str, repository: str = "entities", page_size: int = 10000, parallelism: int = 4,
+                        retries: int = 2, cache: bool = True) -> Iterator[Graph]:
+        """
+        Fetches the result of a large CONSTRUCT query in windows of solutions, see select_pages. The solutions of
+        the WHERE clause are counted first, a window can result in any number of triples (none at all, e.g. if
+        the template only uses OPTIONAL variables) and does not indicate the end. The windows are yielded in order.
+
+        :param query: SPARQL query without LIMIT or OFFSET clause
+        :param repository: The repository type in which the query should search: entities, schema, transactions or application
+        :param page_size: Number of solutions per window
+        :param parallelism: Number of windows fetched concurrently
+        :param retries: Number of retries for each failed window
+        :param cache: Use the query cache configured with entitygraph.connect(), if any
+        """
+        counted = _retrying(lambda: self.select(sparql.count_solutions(query), repository, result_format='json',
+                                                cache=cache, stats_query=query), retries)
+        solutions = int(counted['count'].iloc[0]) if len(counted) else 0
+
+        def fetch(page: int) -> Graph:
+            return self.construct(sparql.paginate(query, page_size, page * page_size), repository, cache=cache,
+                                  stats_query=query)
+
+        return _paged(fetch, lambda graph: False, parallelism, retries, pages=-(-solutions // page_size))
+
+    def _construct_response(self, query: str, repository: str) -> Response:
         endpoint = "api/query/construct"
         params = {'repository': repository}
-        headers = {'X-Application': self._application_label, 'Content-Type': 'text/plain', 'Accept': 'text/turtle'}
-        response: Response = entitygraph._base_client.make_request('POST', endpoint, headers=headers, params=params, data=query)
+        headers = {'X-Application': self._application_label, 'Content-Type': 'text/plain',
+                   'Accept': 'application/n-triples'}
+        return entitygraph._base_client.make_request('POST', endpoint, headers=headers, params=params, data=query,
+                                                     stream=True)
+
+    @staticmethod
+    def _content_type(response: Response) -> str:
+        return response.headers.get('Content-Type', 'text/turtle').split(';')[0].strip()
+
+    def construct_iter(self, query: str, repository: str = "entities", terms: str = 'rdflib') -> Iterator[Tuple]:
+        """
+        Streams the result of a CONSTRUCT query as (s, p, o) triples. The result is requested as N-Triples and
+        parsed line by line while it is received, it is never held in memory as a whole.
+
+        :param query: SPARQL query. For example: 'CONSTRUCT WHERE { ?s ?p ?o . }'
+        :param repository: The repository type in which the query should search: entities, schema, transactions or application
+        :param terms: rdflib (URIRef, Literal and BNode terms) or nt (the N-Triples tokens as strings, the fastest option)
+        """
+        parser = NTriplesParser(terms)
+        response = self._construct_response(query, repository)
+
+        with response:
+            if self._content_type(response) != 'application/n-triples':
+                # The server ignored the requested format, the response has to be parsed as a whole
+                from rdflib import Graph
+
+                graph = Graph().parse(data=response.text, format=self._content_type(response))
+                yield from parser.parse(graph.serialize(format='nt', encoding='utf-8').splitlines())
+                return
+
+            yield from parser.parse(response.iter_lines())
+
+    def construct_into(self, query: str, target: Graph | Store | Path | str, repository: str = "entities",
+                       batch_size: int = 10000) -> Graph | Path:
+        """
+        Streams the result of a CONSTRUCT query into the given target, e.g. to materialize results larger than
+        the available memory.
+
+        :param query: SPARQL query. For example: 'CONSTRUCT WHERE { ?s ?p ?o . }'
+        :param target: An rdflib Graph or Store (e.g. a persistent store), or the path of an N-Triples file
+        :param repository: The repository type in which the query should search: entities, schema, transactions or application
+        :param batch_size: Number of triples added to a graph or store at once
+        :return: The graph (a new Graph if a store was given) or the path
+        """
+        if isinstance(target, (str, Path)):
+            response = self._construct_response(query, repository)
+            with response, open(target, 'wb') as file:
+                if self._content_type(response) == 'application/n-triples':
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        file.write(chunk)
+                else:
+                    from rdflib import Graph
+                    graph = Graph().parse(data=response.text, format=self._content_type(response))
+                    file.write(graph.serialize(format='nt', encoding='utf-8'))
+            return Path(target)
+
+        from rdflib import Graph
 
-        return Graph().parse(data=response.text)
+        graph = target if isinstance(target, Graph) else Graph(store=target)
+        triples = self.construct_iter(query, repository)
+        while True:
+            batch = [(s, p, o, graph) for s, p, o in islice(triples, batch_size)]
+            if not batch:
+                return graph
+            graph.addN(batch)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+from pathlib import Path
+import re
+import shutil
+import tempfile
+import time
+from threading import Lock
+from typing import Tuple
+
+from entitygraph import sparql
+
+
+class QueryCache:
+    """
+    Opt-in cache for query responses, enabled with entitygraph.connect(..., query_cache=QueryCache()).
+
+    Entries are keyed by the normalized query text, the repository, the application label and the requested
+    result format. The raw response is cached, so a hit skips the request but not the parsing. Entries expire
+    after the ttl, the memory tier is bounded by size with least recently used entries evicted first. If a
+    directory is given, entries are also kept on disk. Writes sent by this client to an application invalidate
+    all cached entries of that application.
+    """
+
+    def __init__(self, ttl: float = 300, max_bytes: int = 64 * 1024 * 1024, directory: Path = None):
+        """
+        :param ttl: Seconds until an entry expires
+        :param max_bytes: Maximum size of all entries held in memory
+        :param directory: Optional directory for the disk tier
+        """
+        self.ttl: float = ttl
+        self.max_bytes: int = max_bytes
+        self.directory: Path = Path(directory) if directory else None
+
+        # key -> (expires, application label, content)
+        self._entries: OrderedDict[str, Tuple[float, str, bytes]] = OrderedDict()
+        self._size: int = 0
+        self._lock: Lock = Lock()
+        # Incremented on every invalidation, responses requested before a write are not cached afterwards
+        self.generation: int = 0
+
+    @staticmethod
+    def key(host: str, query: str, repository: str, application: str, accept: str) -> str:
+        normalized = sparql.normalize(query)
+        return hashlib.sha256('\n'.join((host, repository, application, accept, normalized)).encode()).hexdigest()
+
+    def __path(self, application: str, key: str) -> Path:
+        return self.directory / hashlib.sha1(application.encode()).hexdigest() / key
+
+    def get(self, key: str, application: str) -> bytes | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return entry[2]
+                self.__remove(key)
+
+        if self.directory:
+            path = self.__path(application, key)
+            try:
+                if path.stat().st_mtime + self.ttl > now:
+                    content = path.read_bytes()
+                    self.__put_memory(key, application, content, path.stat().st_mtime + self.ttl)
+                    return content
+                path.unlink()
+            except OSError:
+                pass
+
+        return None
+
+    def put(self, key: str, application: str, content: bytes, generation: int = None) -> None:
+        """
+        :param generation: The generation read before the request was sent. If the cache has been invalidated
+                           since, the content might be outdated and is not cached
+        """
+        temporary = self.__write_temporary(content) if self.directory else None
+
+        # The generation is checked and the entry stored under the lock, an invalidation cannot happen in between
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                if temporary is not None:
+                    temporary.unlink(missing_ok=True)
+                return
+
+            self.__insert(key, application, content, time.time() + self.ttl)
+
+            if temporary is not None:
+                path = self.__path(application, key)
+                try:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    # Atomic, a concurrent get() never reads a partially written entry
+                    os.replace(temporary, path)
+                except OSError as err:
+                    temporary.unlink(missing_ok=True)
+                    logging.debug(f"Failed to write query cache entry {path}: {err}")
+
+    def __write_temporary(self, content: bytes) -> Path | None:
+        # Written outside of the application directories, which are removed on invalidation
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            descriptor, name = tempfile.mkstemp(dir=self.directory, prefix='.entry-')
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(content)
+            return Path(name)
+        except OSError as err:
+            logging.debug(f"Failed to write query cache entry into {self.directory}: {err}")
+            return None
+
+    def __put_memory(self, key: str, application: str, content: bytes, expires: float) -> None:
+        with self._lock:
+            self.__insert(key, application, content, expires)
+
+    def __insert(self, key: str, application: str, content: bytes, expires: float) -> None:
+        if len(content) > self.max_bytes:
+            return
+
+        self.__remove(key)
+        self._entries[key] = (expires, application, content)
+        self._size += len(content)
+        while self._size > self.max_bytes:
+            self.__remove(next(iter(self._entries)))
+
+    def __remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[2])
+
+    def invalidate(self, application: str = None) -> None:
+        """
+        Removes all entries of the given application, or all entries if no application is given
+        """
+        with self._lock:
+            self.generation += 1
+            for key in [key for key, entry in self._entries.items() if application is None or entry[1] == application]:
+                self.__remove(key)
+
+        if self.directory:
+            if application is not None:
+                shutil.rmtree(self.__path(application, ''), ignore_errors=True)
+            elif self.directory.is_dir():
+                for path in self.directory.iterdir():
+                    if path.is_dir() and re.fullmatch(r'[0-9a-f]{40}', path.name):
+                        shutil.rmtree(path, ignore_errors=True)
+
+    def clear(self) -> None:
+        self.invalidate()
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from collections import deque
+import hashlib
+import re
+from threading import Lock
+from typing import Deque, Dict, List
+
+from requests import Response
+
+from entitygraph import sparql
+
+_DURATION = re.compile(r'\bdur=([0-9.]+)')
+
+
+def query_hash(query: str) -> str:
+    """
+    Returns a short hash of the normalized query text, queries which only differ in formatting have the same hash
+    """
+    return hashlib.sha256(sparql.normalize(query).encode()).hexdigest()[:16]
+
+
+def server_time(response: Response) -> float | None:
+    """
+    Returns the time the server reported for processing the request in seconds, if any. Read from the
+    Server-Timing header (the sum of all durations) or an X-Response-Time header (in milliseconds).
+    """
+    timing = response.headers.get('Server-Timing')
+    if timing:
+        durations = _DURATION.findall(timing)
+        if durations:
+            return sum(float(duration) for duration in durations) / 1000
+
+    response_time = response.headers.get('X-Response-Time')
+    if response_time:
+        try:
+            return float(re.sub(r'\s*ms$', '', response_time.strip(), flags=re.IGNORECASE)) / 1000
+        except ValueError:
+            pass
+
+    return None
+
+
+def received_bytes(response: Response, content: bytes) -> int:
+    """
+    Returns the size of the response body as received, before a Content-Encoding (e.g. gzip) was decoded. Falls
+    back to the size of the decoded content if the transport does not count the received bytes.
+    """
+    tell = getattr(response.raw, 'tell', None)
+    received = tell() if callable(tell) else 0
+    return received or len(content)
+
+
+class QueryStats:
+    """
+    Timings and sizes of a single query, available as Query.last_stats after the query returned.
+    All times are in seconds.
+    """
+
+    def __init__(self, query: str, repository: str, endpoint: str):
+        # The query the statistics are aggregated under, for windows of a paginated query the unpaginated query
+        self.query: str = query
+        self._query_hash: str = None
+        self.repository: str = repository
+        self.endpoint: str = endpoint
+        self.cached: bool = False
+        # Time the server reported for processing the query, if it sends a Server-Timing header
+        self.server_time: float | None = None
+        # Size of the response body as received, before decoding a Content-Encoding. Zero for cached responses.
+        self.bytes: int = 0
+        # Time until the response headers were received
+        self.ttfb: float = 0.0
+        # Time from sending the request until the whole response was received
+        self.request_time: float = 0.0
+        # Time spent parsing the response, e.g. into a DataFrame
+        self.parse_time: float = 0.0
+        # Number of rows or triples of the result
+        self.count: int | None = None
+
+    @property
+    def query_hash(self) -> str:
+        if self._query_hash is None:
+            self._query_hash = query_hash(self.query)
+        return self._query_hash
+
+    @property
+    def total(self) -> float:
+        return self.request_time + self.parse_time
+
+    def record_response(self, response: Response, content: bytes, request_time: float) -> None:
+        self.server_time = server_time(response)
+        self.bytes = received_bytes(response, content)
+        self.ttfb = response.elapsed.total_seconds()
+        self.request_time = request_time
+
+    def __str__(self):
+        server = f"{self.server_time:.3f}s" if self.server_time is not None else "n/a"
+        return (f"QueryStats(hash={self.query_hash}, repository={self.repository}, cached={self.cached}, "
+                f"server={server}, ttfb={self.ttfb:.3f}s, request={self.request_time:.3f}s, "
+                f"parse={self.parse_time:.3f}s, bytes={self.bytes}, count={self.count})")
+
+
+class QueryAggregate:
+    """
+    Rolling statistics of all executions of one query (by hash)
+    """
+
+    def __init__(self, query_hash: str, query: str, window: int):
+        self.query_hash: str = query_hash
+        self.query: str = query
+        self.executions: int = 0
+        self.cached: int = 0
+        self.total_time: float = 0.0
+        self.max_time: float = 0.0
+        self.bytes: int = 0
+        # Total times of the most recent executions
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def add(self, stats: QueryStats) -> None:
+        self.executions += 1
+        self.cached += stats.cached
+        self.total_time += stats.total
+        self.max_time = max(self.max_time, stats.total)
+        self.bytes += stats.bytes
+        self.recent.append(stats.total)
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.executions if self.executions else 0.0
+
+    @property
+    def p95_time(self) -> float:
+        """
+        95th percentile of the recent executions
+        """
+        if not self.recent:
+            return 0.0
+        times = sorted(self.recent)
+        return times[min(len(times) - 1, int(len(times) * 0.95))]
+
+    def __str__(self):
+        return (f"QueryAggregate(hash={self.query_hash}, executions={self.executions}, cached={self.cached}, "
+                f"mean={self.mean_time:.3f}s, p95={self.p95_time:.3f}s, max={self.max_time:.3f}s, "
+                f"total={self.total_time:.3f}s, bytes={self.bytes})")
+
+
+class QueryStatsRegistry:
+    """
+    Opt-in aggregates per query hash of all queries executed by this client, to find the slowest queries.
+    Enabled with entitygraph.connect(..., query_stats=QueryStatsRegistry()), e.g. query_stats.worst(10)
+    """
+
+    def __init__(self, window: int = 100, max_queries: int = 10000):
+        """
+        :param window: Number of recent executions per query used for the percentiles
+        :param max_queries: Maximum number of distinct queries kept, the least recently executed are dropped first
+        """
+        self.window: int = window
+        self.max_queries: int = max_queries
+        self._aggregates: Dict[str, QueryAggregate] = {}
+        self._lock: Lock = Lock()
+
+    def record(self, stats: QueryStats) -> None:
+        with self._lock:
+            aggregate = self._aggregates.pop(stats.query_hash, None)
+            if aggregate is None:
+                aggregate = QueryAggregate(stats.query_hash, sparql.normalize(stats.query), self.window)
+                if len(self._aggregates) >= self.max_queries:
+                    del self._aggregates[next(iter(self._aggregates))]
+            # Most recently executed last
+            self._aggregates[stats.query_hash] = aggregate
+            aggregate.add(stats)
+
+    def get(self, query_hash: str) -> QueryAggregate | None:
+        return self._aggregates.get(query_hash)
+
+    def worst(self, n: int = 10, by: str = 'total_time') -> List[QueryAggregate]:
+        """
+        Returns the n queries with the highest value of the given aggregate
+
+        :param by: total_time, mean_time, p95_time, max_time, executions or bytes
+        """
+        if by not in ('total_time', 'mean_time', 'p95_time', 'max_time', 'executions', 'bytes'):
+            raise ValueError(f"Unsupported aggregate: {by}")
+
+        with self._lock:
+            aggregates = list(self._aggregates.values())
+        return sorted(aggregates, key=lambda aggregate: getattr(aggregate, by), reverse=True)[:n]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._aggregates.clear()
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import re
+from typing import List, Tuple
+
+# Tokens of a SPARQL query which have to be kept as they are (strings and IRIs), comments and whitespace
+_TOKENS = re.compile(r'''
+      (?P<string>"""(?:[^"\\]|\\.|"(?!""))*"""|\'\'\'(?:[^'\\]|\\.|'(?!''))*\'\'\'
+                 |"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+    | (?P<iri><[^<>"{}|^`\\\s]*>)
+    | (?P<comment>\#[^\n]*)
+    | (?P<space>\s+)
+    | (?P<other>[{}()]|[^"'<\#\s{}()]+|.)
+''', re.VERBOSE | re.DOTALL)
+
+
+def normalize(query: str) -> str:
+    """
+    Normalizes the text of a SPARQL query: comments are removed, whitespace outside of strings and IRIs is
+    collapsed and braces are surrounded by single spaces. Two queries which only differ in formatting (e.g.
+    WHERE{?s ?p ?o} and WHERE { ?s ?p ?o }) are normalized to the same text. Other optional whitespace, e.g.
+    before the dot ending a triple pattern, is kept.
+    """
+    parts = []
+    for match in _TOKENS.finditer(query):
+        kind = match.lastgroup
+        if kind == 'comment':
+            continue
+        brace = match.group() in ('{', '}')
+        if kind == 'space' or brace:
+            if parts and parts[-1] != ' ':
+                parts.append(' ')
+            if brace:
+                parts.extend((match.group(), ' '))
+            continue
+        parts.append(match.group())
+
+    return ''.join(parts).strip()
+
+
+_PROLOGUE = re.compile(r'^(?:\s+|#[^\n]*|PREFIX\s+[^\s:]*:\s*<[^>]*>|BASE\s+<[^>]*>)*', re.IGNORECASE)
+
+
+def split_prologue(query: str) -> Tuple[str, str]:
+    """
+    Splits the query into its prologue (BASE and PREFIX declarations) and the remaining query
+    """
+    end = _PROLOGUE.match(query).end()
+    return query[:end], query[end:]
+
+
+def _code(query: str) -> List[Tuple[int, int, str]]:
+    # Tokens outside of strings, IRIs and comments, with their positions
+    return [(match.start(), match.end(), match.group()) for match in _TOKENS.finditer(query)
+            if match.lastgroup == 'other']
+
+
+def variables(query: str) -> List[str]:
+    """
+    Returns the names of all variables used in the query, in order of their first occurrence
+    """
+    names = []
+    for _, _, token in _code(query):
+        for name in re.findall(r'[?$]([A-Za-z0-9_·À-￿]+)', token):
+            if name not in names:
+                names.append(name)
+    return names
+
+
+_AGGREGATE = re.compile(r'\b(?:COUNT|SUM|MIN|MAX|AVG|SAMPLE|GROUP_CONCAT)\s*\(', re.IGNORECASE)
+
+
+def _last_brace(query: str) -> int:
+    positions = [start for start, _, token in _code(query) if token == '}']
+    if not positions:
+        raise ValueError("Not a valid SPARQL query, missing group graph pattern")
+    return positions[-1]
+
+
+def _aggregates(projection: str, modifiers: str) -> bool:
+    return bool(_AGGREGATE.search(projection) or _AGGREGATE.search(modifiers) or
+                re.search(r'\b(?:GROUP\s+BY|HAVING)\b', modifiers, re.IGNORECASE))
+
+
+def _order_variables(body: str) -> List[str]:
+    brace = next(start for start, _, token in _code(body) if token == '{')
+    head = body[:brace]
+
+    select = re.search(r'\bSELECT\b(?:\s+(?P<modifier>DISTINCT|REDUCED)\b)?(?P<projection>.*?)(?:\bWHERE\b|$)',
+                       head, re.IGNORECASE | re.DOTALL)
+    if select:
+        projection = select.group('projection')
+        end = _last_brace(body) + 1
+        if not select.group('modifier') and not _aggregates(projection, body[end:]):
+            # The projected variables can have ties, which makes the windows overlap. ORDER BY is applied before
+            # the projection, all variables of the pattern give a total order of the solutions.
+            return variables(body[_where_brace(body):end])
+        if '*' not in projection:
+            aliases = re.findall(r'\bAS\s+[?$](\w+)', projection, re.IGNORECASE)
+            # Variables used within expressions are not necessarily in scope of the solution modifiers
+            while re.search(r'\([^()]*\)', projection):
+                projection = re.sub(r'\([^()]*\)', ' ', projection)
+            return variables(projection) + aliases
+
+    if re.search(r'\bCONSTRUCT\b', head, re.IGNORECASE) and re.search(r'\bWHERE\b', body, re.IGNORECASE):
+        # Only the variables of the pattern matter, not the ones of the template
+        return variables(body[re.search(r'\bWHERE\b', body, re.IGNORECASE).start():])
+
+    return variables(body)
+
+
+def _split_values(body: str) -> Tuple[str, str]:
+    # Splits off a trailing VALUES clause (outside of all groups), which has to stay after the solution modifiers
+    depth = 0
+    for start, _, token in _code(body):
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth -= 1
+        elif depth == 0 and token.upper() == 'VALUES':
+            return body[:start], body[start:]
+    return body, ''
+
+
+def paginate(query: str, limit: int, offset: int) -> str:
+    """
+    Rewrites a SELECT or CONSTRUCT query to return a single window of its solutions. If the query has no
+    ORDER BY clause, one over the pattern variables (the projected ones for DISTINCT and aggregating queries)
+    is added to make the windows stable.
+
+    :param query: The SPARQL query, must not have a LIMIT or OFFSET clause
+    :param limit: Size of the window
+    :param offset: Start of the window
+    """
+    prologue, body = split_prologue(query)
+    body, values = _split_values(body)
+    end = _last_brace(body) + 1
+    modifiers = body[end:]
+
+    if re.search(r'\b(?:LIMIT|OFFSET)\b', modifiers, re.IGNORECASE):
+        raise ValueError("Queries with a LIMIT or OFFSET clause cannot be paginated")
+
+    if not re.search(r'\bORDER\s+BY\b', modifiers, re.IGNORECASE):
+        order = ' '.join(f"?{name}" for name in _order_variables(body))
+        if order:
+            modifiers = f"{modifiers.rstrip()} ORDER BY {order}"
+
+    paginated = f"{prologue}{body[:end]}{modifiers.rstrip()} LIMIT {limit} OFFSET {offset}"
+    return f"{paginated} {values.strip()}" if values else paginated
+
+
+_IRI = re.compile(r'[^<>"{}|^`\\\x00-\x20]*')
+
+
+def term(value) -> str:
+    """
+    Serializes a value as SPARQL term: URIRefs as IRIs, Literals and plain Python values (str, int, float, bool,
+    dates) as literals, None as UNDEF. Values are escaped, they cannot alter the structure of the query.
+    """
+    from rdflib import BNode, Literal, URIRef
+
+    if value is None:
+        return 'UNDEF'
+    if isinstance(value, URIRef):
+        if not _IRI.fullmatch(value):
+            raise ValueError(f"Invalid IRI: {value!r}")
+        return f"<{value}>"
+    if isinstance(value, BNode):
+        raise ValueError("Blank nodes cannot be bound as query parameters")
+    if not isinstance(value, Literal):
+        value = Literal(value)
+
+    return value.n3()
+
+
+def result_term(value) -> Tuple[str, str, str, str] | None:
+    """
+    Returns a bound value as term of parsed SPARQL results (see sparql_results.Term), None for UNDEF
+    """
+    from rdflib import Literal, URIRef
+
+    if value is None:
+        return None
+    if isinstance(value, URIRef):
+        return 'uri', str(value), None, None
+    if not isinstance(value, Literal):
+        value = Literal(value)
+
+    return 'literal', str(value), str(value.datatype) if value.datatype else None, value.language
+
+
+def _where_brace(body: str) -> int:
+    where = re.search(r'\bWHERE\b', body, re.IGNORECASE)
+    start = where.end() if where else 0
+    return next(position for position, _, token in _code(body) if token == '{' and position >= start)
+
+
+def count_solutions(query: str) -> str:
+    """
+    Rewrites a CONSTRUCT (or SELECT) query into a SELECT query counting the solutions of its WHERE clause
+    """
+    prologue, body = split_prologue(query)
+    body, values = _split_values(body)
+    counted = f"{prologue}SELECT (COUNT(*) AS ?count) WHERE {body[_where_brace(body):_last_brace(body) + 1]}"
+    return f"{counted} {values.strip()}" if values else counted
+
+
+def is_sliced(query: str) -> bool:
+    """
+    Returns whether the query has a LIMIT or OFFSET clause, outside of sub queries
+    """
+    _, body = split_prologue(query)
+    body, _ = _split_values(body)
+    return bool(re.search(r'\b(?:LIMIT|OFFSET)\b', body[_last_brace(body) + 1:], re.IGNORECASE))
+
+
+def bind_values(query: str, names: List[str], rows: List[List]) -> str:
+    """
+    Binds the variables of a SELECT query with an inline VALUES block at the start of its WHERE clause.
+    The variables are added to the projection if missing, to relate results to their bindings. If the query
+    aggregates, they are added to its GROUP BY clause (which is created if missing), so the aggregates are
+    computed per binding.
+
+    :param query: The SPARQL SELECT query
+    :param names: The names of the variables (without '?')
+    :param rows: The values for each solution, in order of the names
+    """
+    prologue, body = split_prologue(query)
+    body, values = _split_values(body)
+
+    brace = _where_brace(body)
+    select = re.search(r'\bSELECT\b(?:\s+(?:DISTINCT|REDUCED)\b)?', body, re.IGNORECASE)
+    if select is None or select.start() > brace:
+        raise ValueError("Only SELECT queries can be bound with VALUES")
+
+    projection = body[select.end():brace]
+    end = _last_brace(body) + 1
+    modifiers = body[end:]
+
+    # The body is modified from its end, so the positions found before stay valid
+    if _aggregates(projection, modifiers):
+        group = re.search(r'\bGROUP\s+BY\b(?P<keys>.*?)(?=\bHAVING\b|\bORDER\s+BY\b|\bLIMIT\b|\bOFFSET\b|$)',
+                          modifiers, re.IGNORECASE | re.DOTALL)
+        grouped = variables(group.group('keys')) if group else []
+        ungrouped = ' '.join(f"?{name}" for name in names if name not in grouped)
+        if group and ungrouped:
+            position = end + group.start('keys')
+            body = f"{body[:position]} {ungrouped}{body[position:]}"
+        elif ungrouped:
+            body = f"{body[:end]} GROUP BY {ungrouped}{body[end:]}"
+
+    block = ' '.join('(' + ' '.join(term(value) for value in row) + ')' for row in rows)
+    variables_list = ' '.join(f"?{name}" for name in names)
+    body = f"{body[:brace + 1]} VALUES ({variables_list}) {{ {block} }}{body[brace + 1:]}"
+
+    if '*' not in projection:
+        projected = variables(re.sub(r'\([^()]*\bAS\s+[?$]\w+\s*\)', ' ', projection, flags=re.IGNORECASE))
+        missing = ' '.join(f"?{name}" for name in names if name not in projected)
+        if missing:
+            body = f"{body[:select.end()]} {missing}{body[select.end():]}"
+
+    return prologue + (f"{body.rstrip()} {values.strip()}" if values else body)
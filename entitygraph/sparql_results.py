@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import csv
+import io
+import re
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+
+INTEGER_TYPES = {XSD + name for name in (
+    "integer", "int", "long", "short", "byte", "nonNegativeInteger", "nonPositiveInteger", "positiveInteger",
+    "negativeInteger", "unsignedLong", "unsignedInt", "unsignedShort", "unsignedByte")}
+FLOAT_TYPES = {XSD + name for name in ("decimal", "double", "float")}
+BOOLEAN_TYPES = {XSD + "boolean"}
+DATETIME_TYPES = {XSD + name for name in ("dateTime", "dateTimeStamp", "date")}
+
+# A term as (type, value, datatype, language), with type one of 'uri', 'literal' or 'bnode'
+Term = Tuple[str, str, str, str]
+
+_TSV_LITERAL = re.compile(r'^"(?P<value>(?:[^"\\]|\\.)*)"(?:@(?P<lang>[a-zA-Z0-9-]+)|\^\^<(?P<datatype>[^>]*)>)?$')
+_TSV_ESCAPES = {'t': '\t', 'n': '\n', 'r': '\r', 'b': '\b', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+
+
+def parse_json(content: bytes) -> Tuple[List[str], List[Dict[str, Term]]]:
+    """
+    Parses a application/sparql-results+json document into the variable names and the bindings
+    """
+    import json
+
+    document = json.loads(content)
+    variables = document.get('head', {}).get('vars', [])
+    # Older endpoints (SPARQL 1.0 JSON) use the type 'typed-literal' for literals with a datatype
+    rows = [{name: ('literal' if term.get('type') == 'typed-literal' else term.get('type'), term.get('value'),
+                    term.get('datatype'), term.get('xml:lang'))
+             for name, term in binding.items()}
+            for binding in document.get('results', {}).get('bindings', [])]
+
+    return variables, rows
+
+
+def _parse_tsv_term(value: str) -> Term | None:
+    if not value:
+        return None
+    if value.startswith('<') and value.endswith('>'):
+        return 'uri', value[1:-1], None, None
+    if value.startswith('_:'):
+        return 'bnode', value[2:], None, None
+
+    matched = _TSV_LITERAL.match(value)
+    if matched:
+        lexical = re.sub(r'\\(.)', lambda m: _TSV_ESCAPES.get(m.group(1), m.group(1)), matched.group('value'))
+        return 'literal', lexical, matched.group('datatype'), matched.group('lang')
+
+    # Turtle shorthand for numbers and booleans
+    if value in ('true', 'false'):
+        return 'literal', value, XSD + 'boolean', None
+    if re.match(r'^[+-]?\d+$', value):
+        return 'literal', value, XSD + 'integer', None
+    if re.match(r'^[+-]?\d*\.\d+$', value):
+        return 'literal', value, XSD + 'decimal', None
+    if re.match(r'^[+-]?(?:\d+\.?\d*|\.\d+)[eE][+-]?\d+$', value):
+        return 'literal', value, XSD + 'double', None
+    # Not a valid term, kept as plain literal
+    return 'literal', value, None, None
+
+
+def parse_tsv(content: bytes) -> Tuple[List[str], List[Dict[str, Term]]]:
+    """
+    Parses a text/tab-separated-values SPARQL result into the variable names and the bindings
+    """
+    reader = csv.reader(io.StringIO(content.decode('utf-8')), delimiter='\t', quoting=csv.QUOTE_NONE)
+    header = next(reader, [])
+    variables = [name.lstrip('?$') for name in header]
+
+    rows = []
+    for row in reader:
+        terms = {name: _parse_tsv_term(value) for name, value in zip(variables, row)}
+        rows.append({name: term for name, term in terms.items() if term is not None})
+
+    return variables, rows
+
+
+def _column(pandas, terms: List[Term | None]):
+    present = [term for term in terms if term is not None]
+    kinds = {term[0] for term in present}
+    datatypes = {term[2] for term in present}
+
+    if kinds == {'uri'}:
+        return pandas.Categorical([term[1] if term else None for term in terms])
+
+    if kinds == {'literal'}:
+        values = [term[1] if term else None for term in terms]
+        try:
+            if datatypes <= INTEGER_TYPES:
+                return pandas.array([int(value) if value is not None else None for value in values], dtype='Int64')
+            if datatypes <= INTEGER_TYPES | FLOAT_TYPES:
+                return pandas.array([float(value) if value is not None else None for value in values],
+                                    dtype='Float64')
+            if datatypes <= BOOLEAN_TYPES:
+                return pandas.array([value in ('true', '1') if value is not None else None for value in values],
+                                    dtype='boolean')
+            if datatypes <= DATETIME_TYPES:
+                return pandas.to_datetime(values, utc=True, format='ISO8601')
+        except ValueError:
+            # Ill-typed literals (e.g. "abc"^^xsd:integer), the column is kept as strings
+            pass
+
+    return [(f"_:{term[1]}" if term[0] == 'bnode' else term[1]) if term else None for term in terms]
+
+
+def to_dataframe(variables: List[str], rows: List[Dict[str, Term]]) -> DataFrame:
+    """
+    Builds a DataFrame with typed columns from parsed SPARQL results. IRIs become categoricals, numeric,
+    boolean and date literals become nullable numeric, boolean or datetime columns. If a variable is bound
+    to language tagged literals, the tags are kept in an additional column named '{variable}_lang'.
+    """
+    import pandas
+
+    columns = {}
+    for name in variables:
+        terms = [row.get(name) for row in rows]
+        columns[name] = _column(pandas, terms)
+
+        languages = [term[3] if term else None for term in terms]
+        if any(languages):
+            columns[f"{name}_lang"] = pandas.Categorical(languages)
+
+    return pandas.DataFrame(columns)
+
+
+def convert(df: DataFrame, output: str):
+    """
+    Converts the DataFrame into the requested output: pandas, arrow (pyarrow.Table) or polars (polars.DataFrame)
+    """
+    if output == 'pandas':
+        return df
+    if output == 'arrow':
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError("Arrow output requires pyarrow. Install it with: pip install entitygraph-client[arrow]")
+        return pyarrow.Table.from_pandas(df, preserve_index=False)
+    if output == 'polars':
+        try:
+            import polars
+        except ImportError:
+            raise ImportError("Polars output requires polars. Install it with: pip install entitygraph-client[polars]")
+        return polars.from_pandas(df)
+
+    raise ValueError(f"Unsupported output: {output}")
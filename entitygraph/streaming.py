@@ -0,0 +1,95 @@
+from queue import Empty
+import zlib
+from typing import BinaryIO, Callable, Iterable, Iterator, TextIO, Union
+
+Content = Union[str, bytes, bytearray, memoryview, BinaryIO, TextIO, Iterable[Union[str, bytes]]]
+
+
+def iter_chunks(content: Content, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """
+    Yields the content as UTF-8 encoded chunks of at most chunk_size bytes (or characters for strings), without
+    copying it as a whole. Accepts strings, bytes-like objects (bytes, bytearray, memoryview, mmap), binary or text
+    file objects and iterables of str or bytes chunks, which are passed on as they are.
+    """
+    if isinstance(content, str):
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size].encode('utf-8')
+        return
+
+    if hasattr(content, 'read'):
+        for chunk in iter(lambda: content.read(chunk_size), content.read(0)):
+            yield chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+        return
+
+    try:
+        view = memoryview(content)
+    except TypeError:
+        for chunk in content:
+            yield chunk.encode('utf-8') if isinstance(chunk, str) else bytes(chunk)
+        return
+
+    with view:
+        view = view.cast('B')
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start:start + chunk_size])
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """
+    Compresses a stream of chunks into a gzip stream
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _produce(function: Callable[..., Iterable[bytes]], args: tuple, queue) -> None:
+    try:
+        for chunk in function(*args):
+            queue.put(chunk)
+        queue.put(None)
+    except BaseException as err:
+        queue.put(err)
+
+
+def in_process(function: Callable[..., Iterable[bytes]], *args, queue_size: int = 4,
+               start_method: str = None) -> Iterator[bytes]:
+    """
+    Runs a generator function (e.g. a CPU bound serialization) in a worker process and yields its chunks. The
+    chunks are passed through a bounded queue, the worker is blocked while the consumer (e.g. an upload) is
+    queue_size chunks behind. The function must be defined at module level.
+
+    With the fork start method the worker shares the arguments with this process. With spawn or forkserver the
+    arguments are pickled in the calling thread when the worker starts, which takes about as long as
+    serializing them and holds a copy of them in both processes.
+
+    :param start_method: The multiprocessing start method of the worker (fork, spawn or forkserver), defaults to the one configured for multiprocessing
+    """
+    import multiprocessing
+
+    # The platform default is followed unless a start method is given explicitly, fork is not safe everywhere
+    context = multiprocessing.get_context(start_method)
+    queue = context.Queue(maxsize=queue_size)
+    process = context.Process(target=_produce, args=(function, args, queue), daemon=True)
+    process.start()
+    try:
+        while True:
+            try:
+                chunk = queue.get(timeout=1)
+            except Empty:
+                if not process.is_alive():
+                    raise Exception(f"Worker process exited unexpectedly with exit code {process.exitcode}")
+                continue
+
+            if chunk is None:
+                return
+            if isinstance(chunk, BaseException):
+                raise chunk
+            yield chunk
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
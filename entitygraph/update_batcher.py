@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+from entitygraph import sparql
+
+if TYPE_CHECKING:
+    from entitygraph.query import Query
+
+
+class UpdateBatchResult:
+    """
+    Outcome of a single combined update request
+    """
+
+    def __init__(self, index: int, kind: str, operations: int, size: int):
+        self.index: int = index
+        self.kind: str = kind
+        self.operations: int = operations
+        self.size: int = size
+        self.duration: float = 0.0
+        self.error: Exception = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+    def __str__(self):
+        return f"UpdateBatchResult(index={self.index}, kind={self.kind}, operations={self.operations}, size={self.size}, duration={self.duration:.3f}s, error={self.error})"
+
+
+class UpdateBatchError(Exception):
+    """
+    Raised when a batcher used as context manager exits with failed update requests
+    """
+
+    def __init__(self, results: List[UpdateBatchResult]):
+        self.results: List[UpdateBatchResult] = results
+        self.failed: List[UpdateBatchResult] = [result for result in results if not result.succeeded]
+        super().__init__(f"{len(self.failed)} of {len(results)} update batches failed: "
+                         + ', '.join(str(result) for result in self.failed))
+
+
+class UpdateBatcher:
+    """
+    Collects many small updates and submits them as few combined requests, created with Query.batcher(). Used as
+    context manager, the pending updates are sent at the end of the block and an UpdateBatchError is raised if
+    any request failed.
+
+    Inserted and deleted statements are merged into INSERT DATA and DELETE DATA requests bounded by size and by
+    number of statements. Statements connected by blank nodes are always sent in the same request, the server
+    creates new blank nodes for every request. Consecutive requests of the same kind are sent concurrently, a change between inserts
+    and deletes (or a plain update) waits for all previous requests, so the order of the updates is kept.
+    """
+
+    def __init__(self, query: Query, repository: str = "entities", max_bytes: int = 256 * 1024,
+                 max_statements: int = 5000, max_concurrency: int = 4, stop_on_error: bool = True):
+        """
+        :param query: The Query used to send the updates
+        :param repository: The repository type which should be updated: entities, schema, transactions or application
+        :param max_bytes: Maximum size of a single request
+        :param max_statements: Maximum number of statements in a single request
+        :param max_concurrency: Maximum number of requests sent at the same time
+        :param stop_on_error: Do not send further requests once a request failed
+        """
+        self.query: Query = query
+        self.repository: str = repository
+        self.max_bytes: int = max_bytes
+        self.max_statements: int = max_statements
+        self.max_concurrency: int = max_concurrency
+        self.stop_on_error: bool = stop_on_error
+        # (kind, text, blank nodes) with kind 'insert', 'delete' (text is a statement) or 'update' (text is a full
+        # update)
+        self._pending: List[Tuple[str, str, tuple]] = []
+
+    def __enter__(self) -> 'UpdateBatcher':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            results = self.flush()
+            if any(not result.succeeded for result in results):
+                raise UpdateBatchError(results)
+
+    @staticmethod
+    def __statement(kind: str, triple: tuple) -> Tuple[str, str, tuple]:
+        from rdflib import BNode
+
+        blank_nodes = tuple(node for node in triple if isinstance(node, BNode))
+        if blank_nodes and kind == 'delete':
+            raise ValueError(f"Blank nodes cannot be deleted with DELETE DATA: {triple}")
+
+        text = ' '.join(node.n3() if isinstance(node, BNode) else sparql.term(node) for node in triple) + ' .'
+        return kind, text, blank_nodes
+
+    def insert(self, triples: Iterable[tuple]) -> 'UpdateBatcher':
+        """
+        Adds statements to insert
+
+        :param triples: (s, p, o) triples of rdflib terms, e.g. a Graph
+        """
+        self._pending.extend(self.__statement('insert', triple) for triple in triples)
+        return self
+
+    def delete(self, triples: Iterable[tuple]) -> 'UpdateBatcher':
+        """
+        Adds statements to delete
+
+        :param triples: (s, p, o) triples of rdflib terms, must not contain blank nodes
+        """
+        self._pending.extend([self.__statement('delete', triple) for triple in triples])
+        return self
+
+    def update(self, update: str) -> 'UpdateBatcher':
+        """
+        Adds a SPARQL update, which is sent on its own
+        """
+        self._pending.append(('update', update, ()))
+        return self
+
+    @staticmethod
+    def __groups(statements: List[Tuple[str, str, tuple]]) -> List[List[str]]:
+        # Groups statements connected by blank nodes, in order of their first statement
+        parents: Dict[object, object] = {}
+
+        def find(node):
+            while parents.setdefault(node, node) != node:
+                parents[node] = parents[parents[node]]
+                node = parents[node]
+            return node
+
+        for _, _, blank_nodes in statements:
+            for node in blank_nodes[1:]:
+                parents[find(node)] = find(blank_nodes[0])
+
+        groups: Dict[object, List[str]] = {}
+        for index, (_, text, blank_nodes) in enumerate(statements):
+            groups.setdefault(find(blank_nodes[0]) if blank_nodes else index, []).append(text)
+        return list(groups.values())
+
+    def __batches(self) -> List[Tuple[str, str, int]]:
+        batches: List[Tuple[str, str, int]] = []
+        kind, statements, size = None, [], 0
+
+        def close():
+            if statements:
+                keyword = 'INSERT DATA' if kind == 'insert' else 'DELETE DATA'
+                batches.append((kind, f"{keyword} {{\n" + '\n'.join(statements) + "\n}", len(statements)))
+
+        # Runs of consecutive operations of the same kind
+        runs: List[List[Tuple[str, str, tuple]]] = []
+        for operation in self._pending:
+            if runs and operation[0] != 'update' and runs[-1][0][0] == operation[0]:
+                runs[-1].append(operation)
+            else:
+                runs.append([operation])
+
+        for run in runs:
+            operation = run[0][0]
+            if operation == 'update':
+                close()
+                batches.append((operation, run[0][1], 1))
+                kind, statements, size = None, [], 0
+                continue
+
+            for group in self.__groups(run):
+                length = sum(len(text.encode()) + 1 for text in group)
+                # A group is never split, even if it exceeds the limits on its own
+                if statements and (operation != kind or size + length > self.max_bytes
+                                   or len(statements) + len(group) > self.max_statements):
+                    close()
+                    statements, size = [], 0
+                kind = operation
+                statements.extend(group)
+                size += length
+
+        close()
+        return batches
+
+    def flush(self) -> List[UpdateBatchResult]:
+        """
+        Sends all pending updates
+
+        :return: The outcome of each request, in order of the requests
+        """
+        batches = self.__batches()
+        self._pending = []
+
+        results = [UpdateBatchResult(index, kind, operations, len(text.encode()))
+                   for index, (kind, text, operations) in enumerate(batches)]
+
+        def send(index: int) -> None:
+            start = time.perf_counter()
+            try:
+                self.query.update(batches[index][1], self.repository)
+            except Exception as err:
+                results[index].error = err
+                logging.debug(f"Update batch {index} failed: {err}")
+            results[index].duration = time.perf_counter() - start
+
+        # Consecutive batches of the same kind are independent of each other and sent concurrently
+        groups: List[List[int]] = []
+        for index, (kind, _, _) in enumerate(batches):
+            if groups and kind != 'update' and batches[groups[-1][0]][0] == kind:
+                groups[-1].append(index)
+            else:
+                groups.append([index])
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for number, group in enumerate(groups):
+                list(executor.map(send, group))
+                if self.stop_on_error and any(results[index].error for index in group):
+                    for skipped in (index for later in groups[number + 1:] for index in later):
+                        results[skipped].error = Exception("Not sent, a previous update batch failed")
+                    break
+
+        return results
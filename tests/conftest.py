@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+from typing import Callable, Iterable, Type
+
+import pytest
+
+import entitygraph
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """
+    Base of the request handlers of the mock server (see the mock_server fixture), subclasses implement do_GET or
+    do_POST
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def read_body(self) -> bytes:
+        if self.headers.get('Transfer-Encoding') != 'chunked':
+            return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        # Streamed requests (e.g. Admin.import_content) are sent with chunked transfer encoding
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b';')[0], 16)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+            if size == 0:
+                return b''.join(chunks)
+
+    def respond(self, body: str | bytes = b'', content_type: str = 'text/plain', status: int = 200) -> None:
+        body = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def respond_chunked(self, parts: Iterable[bytes], content_type: str = 'text/plain') -> None:
+        # Sends every part as soon as it is produced, as a chunk of a response with chunked transfer encoding
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for part in parts:
+            if part:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(part), part))
+                self.wfile.flush()
+        self.wfile.write(b'0\r\n\r\n')
+
+
+@pytest.fixture
+def mock_server() -> Callable[[Type[BaseHTTPRequestHandler]], ThreadingHTTPServer]:
+    """
+    Starts a local HTTP server with the given handler class and connects the client to it, e.g.
+    mock_server(_Handler). The server is stopped and the client disconnected after the test.
+    """
+    servers = []
+
+    def start(handler: Type[BaseHTTPRequestHandler]) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        entitygraph.connect('key', f'http://127.0.0.1:{server.server_port}')
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+    entitygraph._base_client = None
+
+
+def pytest_terminal_summary(terminalreporter):
+    # Measurements of benchmarks, recorded with the record_property fixture
+    reports = [report for report in terminalreporter.getreports('passed') + terminalreporter.getreports('failed')
+               if report.when == 'call' and report.user_properties]
+    if reports:
+        terminalreporter.section('benchmarks')
+        for report in reports:
+            terminalreporter.line(f"{report.nodeid}: "
+                                  + ', '.join(f"{name}={value}" for name, value in report.user_properties))
@@ -0,0 +1,66 @@
+import pytest
+from rdflib import Graph, URIRef
+
+from conftest import MockHandler
+from entitygraph import BulkBuilder, BulkBuildError, EntityBuilder
+
+SDO = 'https://schema.org/'
+
+
+class _EntitiesHandler(MockHandler):
+    # Accepts all requests but the ones with the given numbers
+    bodies = []
+    failing = ()
+
+    def do_POST(self):
+        self.bodies.append(self.read_body())
+        self.respond(status=500 if len(self.bodies) - 1 in self.failing else 200)
+
+
+@pytest.fixture
+def server(mock_server):
+    _EntitiesHandler.bodies = []
+    _EntitiesHandler.failing = ()
+    return mock_server(_EntitiesHandler)
+
+
+def _builders(count: int):
+    builders = [EntityBuilder(URIRef(SDO + 'Person')).add_any_value(URIRef(SDO + 'name'), f"Person {i}")
+                for i in range(count)]
+    # The first person knows the last one, by its blank node
+    builders[0].link_to_node(URIRef(SDO + 'knows'), builders[-1].node)
+    return builders
+
+
+def test_build_keeps_linked_builders_in_one_chunk(server):
+    builders = _builders(4)
+
+    responses = BulkBuilder(builders, max_entities=1).build()
+
+    assert len(responses) == 3
+    first = Graph().parse(data=_EntitiesHandler.bodies[0], format='nt')
+    assert len(set(first.subjects(URIRef(SDO + 'name'), None))) == 2
+    assert (None, URIRef(SDO + 'knows'), None) in first
+
+
+def test_build_reports_the_created_chunks(server):
+    _EntitiesHandler.failing = (1,)
+    builders = _builders(4)
+
+    with pytest.raises(BulkBuildError) as raised:
+        BulkBuilder(builders, max_entities=1).build(queue_size=0)
+
+    assert raised.value.index == 1
+    assert sorted(raised.value.responses) == [0]
+    assert raised.value.builders == [[builders[0], builders[3]], [builders[1]], [builders[2]]]
+
+
+def test_build_sends_no_chunks_after_a_failure(server):
+    _EntitiesHandler.failing = (1,)
+
+    with pytest.raises(BulkBuildError) as raised:
+        BulkBuilder(_builders(6), max_entities=1).build()
+
+    assert len(_EntitiesHandler.bodies) == 2
+    assert raised.value.index == 1
+    assert sorted(raised.value.responses) == [0]
@@ -0,0 +1,82 @@
+import json
+import re
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from conftest import MockHandler
+from entitygraph import Entity
+from entitygraph.entity import EntityIterable
+
+SDO = 'https://schema.org/'
+FILTERED = SDO + 'award'
+# 2000 entities of 9 properties each, every tenth one has a value for the filtered property
+ENTITIES = [{'@id': f'https://example.org/api/entities/e{i:04d}',
+             **{f'{SDO}p{k}': f'Value {k} of entity {i}' for k in range(9 if i % 10 else 8)},
+             **({} if i % 10 else {FILTERED: f'Award of entity {i}'})}
+            for i in range(2000)]
+
+
+class _EntitiesHandler(MockHandler):
+    # Lists the entities as JSON-LD and answers the generated filter queries, counting the bytes sent
+    sent = []
+
+    def _send(self, body: str, content_type: str):
+        self.sent.append(len(body.encode('utf-8')))
+        self.respond(body, content_type)
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        offset, limit = int(params['offset'][0]), int(params['limit'][0])
+        self._send(json.dumps({'@graph': ENTITIES[offset:offset + limit]}), 'application/ld+json')
+
+    def do_POST(self):
+        query = self.read_body().decode('utf-8')
+        prop = re.search(r'\?entity <([^>]*)> \?value', query).group(1)
+        limit, offset = (int(value) for value in re.search(r'LIMIT (\d+) OFFSET (\d+)', query).groups())
+        matching = [node for node in ENTITIES if prop in node][offset:offset + limit]
+        if self.path.startswith('/api/query/construct'):
+            self._send(''.join(f'<{node["@id"]}> <{name}> "{value}" .\n'
+                               for node in matching for name, value in node.items() if name != '@id'),
+                       'text/turtle')
+        else:
+            self._send('entity\n' + ''.join(f'{node["@id"]}\n' for node in matching), 'text/csv')
+
+
+@pytest.fixture
+def entity(mock_server):
+    mock_server(_EntitiesHandler)
+    return Entity()
+
+
+def test_filter_is_evaluated_by_the_server(entity, record_property):
+    _EntitiesHandler.sent = []
+    # As before the filter was pushed down: all entities are listed and filtered by the client
+    listing = EntityIterable(entity._application_label)
+    listed = [node['@id'].rsplit('/', 1)[-1] for offset in range(0, len(ENTITIES), 100)
+              for node in listing._fetch_listing(offset, 100)['@graph'] if FILTERED in node]
+    client_side = list(_EntitiesHandler.sent)
+
+    _EntitiesHandler.sent = []
+    filtered = [handle.identifier for handle in entity.get_all(FILTERED, page_size=100)]
+    server_side = list(_EntitiesHandler.sent)
+
+    record_property('client side filter', f"{len(client_side)} requests, {sum(client_side) / 1000:.0f} KB")
+    record_property('server side filter', f"{len(server_side)} requests, {sum(server_side) / 1000:.0f} KB")
+
+    assert filtered == listed
+    assert sum(server_side) * 10 < sum(client_side)
+
+
+def test_raw_scan_with_a_plain_string_property(entity):
+    triples = list(entity.get_all(FILTERED, page_size=50).scan(parallelism=2, raw=True))
+
+    assert len({subject for subject, _, _ in triples}) == 200
+    assert len(triples) == 200 * 9
+
+
+@pytest.mark.parametrize('iri', ['https://schema.org/> ?x <https://schema.org/name', 'https://schema.org/name\n',
+                                 'https://schema.org/name\n?x'])
+def test_filter_rejects_invalid_iris(entity, iri):
+    with pytest.raises(ValueError):
+        list(entity.get_all(iri))
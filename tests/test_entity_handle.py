@@ -0,0 +1,62 @@
+import time
+import tracemalloc
+
+import pytest
+
+import entitygraph
+from entitygraph import Entity, EntityHandle
+
+COUNT = 100000
+
+
+@pytest.fixture
+def connected():
+    # Entities are not loaded, nothing is requested from the host
+    entitygraph.connect('key', 'http://127.0.0.1:9')
+    yield
+    entitygraph._base_client = None
+
+
+def _entity(identifier: str) -> Entity:
+    # As listings created entities before handles were introduced
+    entity = Entity(scope='default')
+    entity._id = identifier
+    return entity
+
+
+def _measure(create, identifiers):
+    tracemalloc.start()
+    objects = [create(identifier) for identifier in identifiers]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+
+    start = time.perf_counter()
+    objects = [create(identifier) for identifier in identifiers]
+    rate = len(objects) / (time.perf_counter() - start)
+
+    return size / len(identifiers), rate
+
+
+@pytest.mark.benchmark
+def test_handles_are_smaller_and_faster_to_create_than_entities(connected, record_property):
+    identifiers = [f"e{i:08d}" for i in range(COUNT)]
+
+    handle_size, handle_rate = _measure(lambda identifier: EntityHandle(identifier, 'default'), identifiers)
+    entity_size, entity_rate = _measure(_entity, identifiers)
+    record_property('handle', f"{handle_size:.0f} B, {handle_rate / 1000:.0f}k/s")
+    record_property('entity', f"{entity_size:.0f} B, {entity_rate / 1000:.0f}k/s")
+
+    assert handle_size < entity_size
+    assert handle_rate > entity_rate
+
+
+def test_handle_is_not_promoted_by_private_lookups(connected):
+    import copy
+    import pickle
+
+    handle = EntityHandle('e1')
+
+    assert copy.copy(handle).identifier == 'e1'
+    assert pickle.loads(pickle.dumps(handle)).identifier == 'e1'
+    assert handle._entity is None
@@ -0,0 +1,75 @@
+import json
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from conftest import MockHandler
+from entitygraph import Entity
+
+
+class _ListingHandler(MockHandler):
+    # Lists the given number of entities as JSON-LD, recording the requested offsets
+    count = 0
+    offsets = []
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        offset, limit = int(params['offset'][0]), int(params['limit'][0])
+        self.offsets.append(offset)
+        nodes = [{'@id': f'https://example.org/api/entities/e{i:04d}', 'https://schema.org/name': f'Entity {i}'}
+                 for i in range(offset, min(offset + limit, self.count))]
+        self.respond(json.dumps({'@graph': nodes}), 'application/ld+json')
+
+
+@pytest.fixture
+def listing(mock_server):
+    def start(count: int) -> Entity:
+        _ListingHandler.count, _ListingHandler.offsets = count, []
+        mock_server(_ListingHandler)
+        return Entity()
+
+    return start
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+@pytest.mark.parametrize('count, offsets', [(250, [0, 100, 200]), (300, [0, 100, 200, 300]), (0, [0])])
+def test_iteration_ends_on_a_short_or_empty_page(listing, prefetch, count, offsets):
+    entity = listing(count)
+
+    identifiers = [handle.identifier for handle in entity.get_all(page_size=100, prefetch=prefetch)]
+
+    assert identifiers == [f'e{i:04d}' for i in range(count)]
+    assert sorted(_ListingHandler.offsets) == offsets
+
+
+@pytest.mark.parametrize('prefetch, ahead', [(True, 1), (False, 0)])
+def test_iteration_is_lazy(listing, prefetch, ahead):
+    entity = listing(1000)
+
+    entities = iter(entity.get_all(page_size=100, prefetch=prefetch))
+    for _ in range(150):
+        next(entities)
+
+    # The prefetched page may still be in flight
+    assert sorted(_ListingHandler.offsets)[:2] == [0, 100]
+    assert max(_ListingHandler.offsets) <= 100 * (1 + ahead)
+
+
+def test_slices_are_fetched_as_single_pages(listing):
+    entities = listing(250).get_all()
+
+    assert [handle.identifier for handle in entities[0:10]] == [f'e{i:04d}' for i in range(10)]
+    assert [handle.identifier for handle in entities[10:20]] == [f'e{i:04d}' for i in range(10, 20)]
+    assert len(entities[5]) == 5
+    assert _ListingHandler.offsets == [0, 10, 0]
+
+
+@pytest.mark.parametrize('count', [2500, 3000])
+def test_scan_yields_every_entity_once(listing, count):
+    entity = listing(count)
+
+    identifiers = [handle.identifier for handle in entity.scan(parallelism=3, page_size=500)]
+
+    assert sorted(identifiers) == [f'e{i:04d}' for i in range(count)]
+    # Pages are only requested until the first short page was received, plus the ones in flight by then
+    assert len(_ListingHandler.offsets) <= count // 500 + 3
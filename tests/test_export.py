@@ -0,0 +1,35 @@
+import pytest
+
+from conftest import MockHandler
+from entitygraph import Admin
+
+STATEMENTS = b'<https://example.org/a> <https://schema.org/name> "A" .\n' \
+             b'<https://example.org/b> <https://schema.org/name> "B" .\n'
+
+
+class _ConstructHandler(MockHandler):
+    content_type = 'application/n-triples'
+
+    def do_POST(self):
+        self.read_body()
+        self.respond(STATEMENTS, self.content_type)
+
+
+@pytest.fixture
+def admin(mock_server):
+    _ConstructHandler.content_type = 'application/n-triples'
+    mock_server(_ConstructHandler)
+    return Admin()
+
+
+def test_export_streams_n_triples(admin, tmp_path):
+    assert admin.export(tmp_path / 'export.nt') == 2
+    assert (tmp_path / 'export.nt').read_bytes() == STATEMENTS
+
+
+def test_export_rejects_other_formats(admin, tmp_path):
+    _ConstructHandler.content_type = 'text/turtle'
+
+    with pytest.raises(Exception, match='application/n-triples'):
+        admin.export(tmp_path / 'export.nt')
+    assert not (tmp_path / 'export.nt').exists()
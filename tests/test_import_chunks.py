@@ -0,0 +1,71 @@
+from rdflib import Graph
+from rdflib.compare import isomorphic
+
+from entitygraph.admin import Admin
+
+# Name mangled private helper, it does not need a connection
+_chunks = Admin._Admin__chunks
+
+
+def _lines(count: int, bnode_every: int = None) -> bytes:
+    lines = []
+    for i in range(count):
+        lines.append(f'<https://example.org/e{i}> <https://schema.org/name> "Entity {i}" .\n')
+        if bnode_every and i % bnode_every == 0:
+            lines.append(f'<https://example.org/e{i}> <https://schema.org/address> _:a{i} .\n')
+    return ''.join(lines).encode('utf-8')
+
+
+def _parts(path, chunk_size: int):
+    data = path.read_bytes()
+    chunks = _chunks(path, chunk_size)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(data)
+    assert all(end == start for (_, end), (start, _) in zip(chunks, chunks[1:]))
+    return [data[start:end] for start, end in chunks]
+
+
+def test_chunks_split_at_line_breaks(tmp_path):
+    path = tmp_path / 'entities.nt'
+    path.write_bytes(_lines(1000))
+
+    parts = _parts(path, 4096)
+
+    assert len(parts) > 1
+    assert all(part.endswith(b'\n') for part in parts)
+
+
+def test_chunks_keep_blank_nodes_in_one_part(tmp_path):
+    data = _lines(1000, bnode_every=10)
+    # The blank nodes are described at the end of the file, far from where they are used
+    data += ''.join(f'_:a{i} <https://schema.org/postalCode> "{i}" .\n' for i in range(500, 1000, 10)).encode('utf-8')
+    path = tmp_path / 'entities.nt'
+    path.write_bytes(data)
+
+    parts = _parts(path, 4096)
+
+    # Only the entities before the first blank node described at the end are split off
+    assert len(parts) > 1
+    labels = [{label.split()[0] for label in part.split(b'_:')[1:]} for part in parts]
+    for index, part_labels in enumerate(labels):
+        for other in labels[index + 1:]:
+            assert not part_labels & other
+
+    # Importing the parts separately gives the same graph as the whole file
+    graph = Graph()
+    for part in parts:
+        graph.parse(data=part, format='nt')
+    assert isomorphic(graph, Graph().parse(data=data, format='nt'))
+
+
+def test_chunks_report_scan_progress(tmp_path):
+    path = tmp_path / 'entities.nt'
+    path.write_bytes(_lines(1000, bnode_every=10))
+    size = path.stat().st_size
+    reported = []
+
+    _chunks(path, 4096, lambda scanned, total: reported.append((scanned, total)), 16 * 1024)
+
+    assert len(reported) > 2
+    assert all(total == size for _, total in reported)
+    assert [scanned for scanned, _ in reported] == sorted(scanned for scanned, _ in reported)
+    assert reported[-1][0] == size
@@ -0,0 +1,23 @@
+import pytest
+
+from entitygraph.import_journal import ImportJournal
+
+
+def test_journal_resumes_the_same_import(tmp_path):
+    data = tmp_path / 'entities.nt'
+    data.write_bytes(b'<https://example.org/a> <https://schema.org/name> "A" .\n')
+    journal = ImportJournal(tmp_path / 'journal', data, 'application/n-triples', 'entities', 'default', 4096)
+    journal.complete(0, 10, 'hash')
+
+    resumed = ImportJournal(tmp_path / 'journal', data, 'application/n-triples', 'entities', 'default', 4096)
+
+    assert resumed.is_completed(0, 10, 'hash')
+
+
+def test_journal_rejects_another_chunk_size(tmp_path):
+    data = tmp_path / 'entities.nt'
+    data.write_bytes(b'<https://example.org/a> <https://schema.org/name> "A" .\n')
+    ImportJournal(tmp_path / 'journal', data, 'application/n-triples', 'entities', 'default', 4096)
+
+    with pytest.raises(ValueError, match='another import'):
+        ImportJournal(tmp_path / 'journal', data, 'application/n-triples', 'entities', 'default', 8192)
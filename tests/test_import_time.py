@@ -0,0 +1,41 @@
+from pathlib import Path
+import re
+import subprocess
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    # A fresh interpreter, modules imported by other tests must not hide what importing entitygraph loads
+    return subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                          check=True, cwd=ROOT)
+
+
+def _cumulative_us(stderr: str, module: str) -> int:
+    # Lines of -X importtime: "import time: self [us] | cumulative | imported package"
+    for line in stderr.splitlines():
+        match = re.match(r'import time:\s*\d+ \|\s*(\d+) \|\s*(\S+)$', line)
+        if match and match.group(2) == module:
+            return int(match.group(1))
+    raise AssertionError(f"{module} not found in the import time report")
+
+
+def test_import_does_not_load_heavy_dependencies():
+    result = _run("import sys, entitygraph; "
+                  "print(' '.join(m for m in ('pandas', 'rdflib', 'entitygraph.namespace_map') if m in sys.modules))")
+
+    assert result.stdout.strip() == ''
+
+
+@pytest.mark.benchmark
+def test_import_is_faster_than_pandas(record_property):
+    entitygraph_us = _cumulative_us(_run("import entitygraph").stderr, 'entitygraph')
+    pandas_us = _cumulative_us(_run("import pandas").stderr, 'pandas')
+    record_property('import entitygraph', f"{entitygraph_us / 1000:.0f} ms")
+    record_property('import pandas', f"{pandas_us / 1000:.0f} ms")
+
+    # Importing the client used to take longer than pandas alone, since it imported pandas and rdflib eagerly
+    assert entitygraph_us < pandas_us
@@ -0,0 +1,93 @@
+import pytest
+
+from conftest import MockHandler
+from entitygraph.namespaces import NamespaceIndex, NamespaceRegistry
+
+# Overlapping namespaces, within a bucket ('http://example.org/pl') and across buckets
+NAMESPACES = {'http://purl.org/rss/1.0/': 'rss', 'http://purl.org/rss/1.0/modules/content/': 'content',
+              'http://example.org/': 'ex', 'http://example.org/pl': 'pl', 'http://example.org/plant/': 'plant'}
+
+
+class _TurtleHandler(MockHandler):
+    def do_GET(self):
+        self.respond(b'@prefix eav: <https://example.org/eav#> .\n'
+                     b'<https://example.org/a> eav:name "A" .\n', 'text/turtle')
+
+
+@pytest.fixture
+def server(mock_server):
+    return mock_server(_TurtleHandler)
+
+
+def test_sync_registers_only_the_declared_prefixes(server, tmp_path):
+    registry = NamespaceRegistry().sync(tmp_path / 'namespaces.json')
+
+    assert registry.synced == {'https://example.org/eav#': 'eav'}
+
+    cached = NamespaceRegistry()
+    assert cached.load(tmp_path / 'namespaces.json')
+    assert cached.synced == registry.synced
+
+
+def test_match_finds_the_longest_namespace():
+    index = NamespaceIndex(NAMESPACES)
+
+    assert index.prefixed('http://purl.org/rss/1.0/modules/content/encoded') == 'content.encoded'
+    assert index.prefixed('http://purl.org/rss/1.0/channel') == 'rss.channel'
+    assert index.prefixed('http://example.org/plant/Rose') == 'plant.Rose'
+    assert index.prefixed('http://example.org/planet') == 'pl.anet'
+    assert index.prefixed('http://example.org/other/Rose') == 'ex.other/Rose'
+    assert index.match('https://example.org/plant/Rose') is None
+
+
+def test_add_invalidates_the_matches():
+    index = NamespaceIndex({'http://example.org/': 'ex'})
+    assert index.prefixed('http://example.org/plant/Rose') == 'ex.plant/Rose'
+    assert index.match('https://schema.org/name') is None
+
+    index.add('http://example.org/plant/', 'plant')
+    index.add('https://schema.org/', 'sdo')
+
+    assert index.prefixed('http://example.org/plant/Rose') == 'plant.Rose'
+    assert index.prefixed('https://schema.org/name') == 'sdo.name'
+
+
+def test_compact_and_expand_series_round_trip():
+    import pandas
+
+    index = NamespaceIndex(NAMESPACES)
+    series = pandas.Series(['http://example.org/plant/Rose', None, 'https://unknown.org/a', float('nan'),
+                            'http://example.org/plant/Rose'])
+
+    compacted = index.compact_series(series)
+
+    assert list(compacted[[0, 2, 4]]) == ['plant:Rose', 'https://unknown.org/a', 'plant:Rose']
+    assert compacted[[1, 3]].isna().all()
+    pandas.testing.assert_series_equal(index.expand_series(compacted), series)
+
+
+def test_expand_keeps_full_uris_and_unknown_prefixes():
+    index = NamespaceIndex(NAMESPACES)
+
+    assert index.expand('http://example.org/plant/Rose') == 'http://example.org/plant/Rose'
+    assert index.expand('unknown:Rose') == 'unknown:Rose'
+    assert index.expand('Rose') == 'Rose'
+    assert index.expand('plant:Rose') == 'http://example.org/plant/Rose'
+
+
+def test_compact_and_expand_triples_round_trip():
+    from rdflib import BNode, Literal, URIRef
+
+    index = NamespaceIndex(NAMESPACES)
+    triples = [(URIRef('http://example.org/plant/Rose'), URIRef('http://example.org/name'), Literal('plant:Rose')),
+               (BNode('b0'), URIRef('https://unknown.org/p'), Literal('1', datatype=URIRef('http://example.org/int'))),
+               (URIRef('http://example.org/plant/Rose'), URIRef('http://example.org/p'), URIRef('http://example.org/'))]
+
+    compacted = list(index.compact_triples(triples))
+    expanded = list(index.expand_triples(compacted))
+
+    assert compacted[0] == ('plant:Rose', 'ex:name', Literal('plant:Rose'))
+    assert compacted[1][2] is triples[1][2]
+    assert expanded == triples
+    assert [[type(term) for term in statement] for statement in expanded] == \
+           [[type(term) for term in statement] for statement in triples]
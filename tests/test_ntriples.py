@@ -0,0 +1,111 @@
+import time
+
+import pytest
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+
+from conftest import MockHandler
+from entitygraph import Admin
+from entitygraph.ntriples import NTriplesParser, serialize
+
+SDO = 'https://schema.org/'
+XSD = 'http://www.w3.org/2001/XMLSchema#'
+SAMPLE = r'''
+# comment
+<https://example.org/a> <https://schema.org/name> "A" .
+<https://example.org/a> <https://schema.org/name> "Ä \"quoted\"\ttab\nnew line ä \U0001F600"@de-AT .
+<https://example.org/a> <https://schema.org/age> "42"^^<http://www.w3.org/2001/XMLSchema#integer> .
+<https://example.org/a> <https://schema.org/knows> _:b1 .
+_:b1 <https://schema.org/name> "B"@en .
+_:b1 <https://schema.org/knows> _:b2.x .
+_:b2.x <https://schema.org/url> <https://example.org/b?q=1#f> .	# trailing comment
+'''
+
+
+def _statements(count: int) -> str:
+    return ''.join(
+        f'<https://example.org/e{i}> <https://schema.org/name> "Entity \\"{i}\\"\\n"@en .\n'
+        f'<https://example.org/e{i}> <https://schema.org/value> "{i}"^^<http://www.w3.org/2001/XMLSchema#integer> .\n'
+        f'<https://example.org/e{i}> <https://schema.org/knows> _:b{i} .\n'
+        f'_:b{i} <https://schema.org/identifier> "id-\\u00E4-{i}" .\n'
+        for i in range(count))
+
+
+def _graph() -> Graph:
+    # Literals with characters N-Triples escapes, language tags, datatypes and blank nodes
+    graph = Graph()
+    a, name, knows = URIRef('https://example.org/a'), URIRef(SDO + 'name'), URIRef(SDO + 'knows')
+    b, c = BNode(), BNode()
+    for value in ('A', 'say "hi"', 'line\nbreak\r\nand\ttab', 'back\\slash \\n', 'Größe ✓ \U0001F600', '', '"'):
+        graph.add((a, name, Literal(value)))
+    graph.add((a, name, Literal('Grüße "zusammen"\n', lang='de-AT')))
+    graph.add((a, URIRef(SDO + 'age'), Literal(42)))
+    graph.add((a, URIRef(SDO + 'date'), Literal('2024-01-01', datatype=URIRef(XSD + 'date'))))
+    graph.add((a, knows, b))
+    graph.add((b, knows, c))
+    graph.add((c, name, Literal('C', lang='en')))
+    return graph
+
+
+def _parse(data: str, terms: str = 'rdflib') -> Graph:
+    graph = Graph()
+    for statement in NTriplesParser(terms=terms).parse(data.splitlines(keepends=True)):
+        graph.add(statement)
+    return graph
+
+
+def test_parse_matches_rdflib():
+    assert isomorphic(_parse(SAMPLE), Graph().parse(data=SAMPLE, format='nt'))
+
+
+def test_parse_nt_terms():
+    statements = list(NTriplesParser(terms='nt').parse(SAMPLE.encode('utf-8').splitlines(keepends=True)))
+
+    assert len(statements) == 7
+    assert statements[3] == ('<https://example.org/a>', '<https://schema.org/knows>', '_:b1')
+    assert statements[2][2] == '"42"^^<http://www.w3.org/2001/XMLSchema#integer>'
+
+
+def test_serialize_round_trips_through_rdflib():
+    graph = _graph()
+    batches = list(serialize(graph, batch_size=3))
+
+    assert len(batches) == (len(graph) + 2) // 3
+    assert isomorphic(Graph().parse(data=b''.join(batches), format='nt'), graph)
+
+
+class _ImportHandler(MockHandler):
+    bodies = []
+
+    def do_POST(self):
+        self.bodies.append(self.read_body())
+        self.respond()
+
+
+@pytest.mark.parametrize('process', [False, True])
+def test_import_graph_sends_the_serialized_graph(mock_server, process):
+    _ImportHandler.bodies = []
+    mock_server(_ImportHandler)
+    graph = _graph()
+
+    Admin().import_graph(graph, batch_size=3, process=process)
+
+    assert isomorphic(Graph().parse(data=_ImportHandler.bodies[0], format='nt'), graph)
+
+
+@pytest.mark.benchmark
+def test_parse_is_faster_than_rdflib(record_property):
+    data = _statements(5000)
+
+    start = time.perf_counter()
+    expected = Graph().parse(data=data, format='nt')
+    rdflib_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    statements = list(NTriplesParser().parse(data.splitlines(keepends=True)))
+    parser_time = time.perf_counter() - start
+    record_property('rdflib', f"{rdflib_time:.3f}s")
+    record_property('NTriplesParser', f"{parser_time:.3f}s")
+
+    assert len(statements) == len(expected)
+    assert parser_time < rdflib_time
@@ -0,0 +1,63 @@
+import json
+import re
+
+import pytest
+
+from conftest import MockHandler
+from entitygraph import sparql
+from entitygraph.query import Query
+
+# Triples of each window of 10 solutions, the second window has no labels at all
+WINDOWS = [3, 0, 5, 2]
+QUERY = ('CONSTRUCT { ?s <http://www.w3.org/2000/01/rdf-schema#label> ?l } '
+         'WHERE { ?s a <https://example.org/T> OPTIONAL { ?s <http://www.w3.org/2000/01/rdf-schema#label> ?l } }')
+
+
+def test_paginate_orders_plain_selects_by_all_pattern_variables():
+    paginated = sparql.paginate('SELECT ?type WHERE { ?s a ?type }', 10, 20)
+
+    assert paginated == 'SELECT ?type WHERE { ?s a ?type } ORDER BY ?s ?type LIMIT 10 OFFSET 20'
+
+
+def test_paginate_orders_distinct_and_aggregating_selects_by_the_projection():
+    assert sparql.paginate('SELECT DISTINCT ?type WHERE { ?s a ?type }', 10, 0).endswith(
+        'ORDER BY ?type LIMIT 10 OFFSET 0')
+    assert sparql.paginate('SELECT ?type (COUNT(?s) AS ?n) WHERE { ?s a ?type } GROUP BY ?type', 10, 0).endswith(
+        'GROUP BY ?type ORDER BY ?type ?n LIMIT 10 OFFSET 0')
+
+
+def test_count_solutions():
+    counted = sparql.count_solutions('PREFIX ex: <https://example.org/> CONSTRUCT { ?s ex:p ?o } '
+                                     'WHERE { ?s ex:p ?o } VALUES ?o { 1 }')
+
+    assert counted == 'PREFIX ex: <https://example.org/> SELECT (COUNT(*) AS ?count) WHERE { ?s ex:p ?o } VALUES ?o { 1 }'
+
+
+class _WindowsHandler(MockHandler):
+    def do_POST(self):
+        query = self.read_body().decode('utf-8')
+        if 'COUNT(*)' in query:
+            content_type = 'application/sparql-results+json'
+            body = json.dumps({'head': {'vars': ['count']}, 'results': {'bindings': [{'count': {
+                'type': 'literal', 'value': str(10 * len(WINDOWS)),
+                'datatype': 'http://www.w3.org/2001/XMLSchema#integer'}}]}})
+        else:
+            window = int(re.search(r'OFFSET (\d+)', query).group(1)) // 10
+            triples = WINDOWS[window] if window < len(WINDOWS) else 0
+            content_type = 'text/turtle'
+            body = ''.join(f'<https://example.org/e{window}-{i}> <http://www.w3.org/2000/01/rdf-schema#label> "{i}" .\n'
+                           for i in range(triples))
+        self.respond(body, content_type)
+
+
+@pytest.fixture
+def query(mock_server):
+    mock_server(_WindowsHandler)
+    return Query()
+
+
+def test_construct_pages_continue_after_empty_windows(query):
+    pages = list(query.construct_pages(QUERY, page_size=10, parallelism=2))
+
+    assert [len(page) for page in pages] == WINDOWS
+    assert len(query.construct(QUERY, page_size=10)) == sum(WINDOWS)
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from rdflib import Literal, URIRef
+
+from conftest import MockHandler
+from entitygraph import sparql
+from entitygraph.query import Query
+
+
+def test_bind_values_adds_the_variables_to_the_projection():
+    bound = sparql.bind_values('SELECT ?name WHERE { ?subject <https://schema.org/name> ?name }', ['subject'],
+                               [[URIRef('https://example.org/a')]])
+
+    assert bound == ('SELECT ?subject ?name WHERE { VALUES (?subject) { (<https://example.org/a>) } '
+                     '?subject <https://schema.org/name> ?name }')
+
+
+def test_bind_values_groups_aggregates_by_the_variables():
+    bound = sparql.bind_values('SELECT (COUNT(?name) AS ?n) WHERE { ?subject <https://schema.org/name> ?name }',
+                               ['subject'], [[URIRef('https://example.org/a')]])
+    assert bound.endswith('?name } GROUP BY ?subject')
+    assert bound.startswith('SELECT ?subject (COUNT(?name) AS ?n)')
+
+    bound = sparql.bind_values('SELECT ?type (COUNT(?s) AS ?n) WHERE { ?s a ?type } GROUP BY ?type ORDER BY ?n',
+                               ['type'], [[URIRef('https://example.org/T')]])
+    assert bound.endswith('} GROUP BY ?type ORDER BY ?n')
+
+    bound = sparql.bind_values('SELECT ?type (COUNT(?s) AS ?n) WHERE { ?s a ?type ; ?p ?o } GROUP BY ?type',
+                               ['p'], [[URIRef('https://example.org/p')]])
+    assert bound.endswith('} GROUP BY ?p ?type')
+
+
+def test_bind_values_keeps_a_trailing_values_clause_last():
+    bound = sparql.bind_values('SELECT ?name WHERE { ?s ?p ?name } VALUES ?p { <https://schema.org/name> }',
+                               ['s'], [[URIRef('https://example.org/a')]])
+
+    assert bound.endswith('?name } VALUES ?p { <https://schema.org/name> }')
+
+
+def test_is_sliced():
+    assert sparql.is_sliced('SELECT ?s WHERE { ?s ?p ?o } LIMIT 1')
+    assert not sparql.is_sliced('SELECT ?s WHERE { { SELECT ?s WHERE { ?s ?p ?o } LIMIT 1 } }')
+
+
+class _LanguagesHandler(MockHandler):
+    # Answers every query with the same rows, one per language of the bound literal
+    requests = []
+
+    def do_POST(self):
+        self.requests.append(self.read_body().decode('utf-8'))
+        body = json.dumps({'head': {'vars': ['label', 'subject']}, 'results': {'bindings': [
+            {'label': {'type': 'literal', 'value': 'a', 'xml:lang': 'en'},
+             'subject': {'type': 'uri', 'value': 'https://example.org/en'}},
+            {'label': {'type': 'literal', 'value': 'a', 'xml:lang': 'de'},
+             'subject': {'type': 'uri', 'value': 'https://example.org/de'}},
+        ]}})
+        self.respond(body, 'application/sparql-results+json')
+
+
+@pytest.fixture
+def query(mock_server):
+    _LanguagesHandler.requests = []
+    mock_server(_LanguagesHandler)
+    return Query()
+
+
+def test_execute_many_relates_rows_by_the_complete_terms(query):
+    prepared = query.prepare('SELECT ?subject WHERE { ?subject <https://schema.org/name> ?label }')
+
+    english, german = prepared.execute_many([{'label': Literal('a', lang='en')}, {'label': Literal('a', lang='de')}])
+
+    assert len(_LanguagesHandler.requests) == 1
+    assert list(english['subject']) == ['https://example.org/en']
+    assert list(german['subject']) == ['https://example.org/de']
+
+
+def test_execute_many_runs_sliced_templates_per_parameter_set(query):
+    prepared = query.prepare('SELECT ?subject WHERE { ?subject <https://schema.org/name> ?label } LIMIT 1')
+
+    results = prepared.execute_many([{'label': Literal('a', lang='en')}, {'label': Literal('a', lang='de')}])
+
+    assert len(_LanguagesHandler.requests) == 2
+    assert [len(result) for result in results] == [2, 2]
@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+import entitygraph
+from conftest import MockHandler
+from entitygraph import Admin, QueryCache
+from entitygraph.query import Query
+
+ASK = 'ASK WHERE { ?s ?p ?o }'
+
+
+class _AskHandler(MockHandler):
+    # Answers ASK queries and accepts all writes, recording the paths of the requests. Queries wait for the release
+    # event, so a write can land while a query is in flight.
+    paths = []
+    arrived = threading.Event()
+    release = threading.Event()
+
+    def do_POST(self):
+        self.read_body()
+        self.paths.append(self.path.split('?')[0])
+        if self.path.startswith('/api/query/ask'):
+            self.arrived.set()
+            self.release.wait(5)
+            self.respond('{"boolean": true}', 'application/sparql-results+json')
+        else:
+            self.respond()
+
+    def do_GET(self):
+        self.paths.append(self.path.split('?')[0])
+        self.respond()
+
+
+@pytest.fixture
+def connect(mock_server):
+    _AskHandler.paths = []
+    _AskHandler.arrived.clear()
+    _AskHandler.release.set()
+    server = mock_server(_AskHandler)
+
+    def connect_with(cache: QueryCache):
+        entitygraph.connect('key', f'http://127.0.0.1:{server.server_port}', query_cache=cache)
+
+    return connect_with
+
+
+def _query(application: str) -> Query:
+    query = Query()
+    query._application_label = application
+    return query
+
+
+def _admin(application: str) -> Admin:
+    admin = Admin()
+    admin._application_label = application
+    return admin
+
+
+def _asked() -> int:
+    return _AskHandler.paths.count('/api/query/ask')
+
+
+def test_key_is_the_normalized_query_and_the_accepted_type():
+    key = QueryCache.key('http://host', 'ASK WHERE{?s ?p ?o}', 'entities', 'default', 'text/csv')
+
+    assert key == QueryCache.key('http://host', 'ASK  WHERE {\n  ?s ?p ?o # any\n}', 'entities', 'default', 'text/csv')
+    assert key != QueryCache.key('http://host', 'ASK WHERE{?s ?p ?o}', 'entities', 'default', 'text/tab-separated-values')
+    assert key != QueryCache.key('http://host', 'ASK WHERE{?s ?p "o"}', 'entities', 'default', 'text/csv')
+
+
+def test_entries_are_evicted_least_recently_used_first():
+    cache = QueryCache(max_bytes=10)
+    cache.put('a', 'default', b'aaaa')
+    cache.put('b', 'default', b'bbbb')
+    cache.get('a', 'default')
+    cache.put('c', 'default', b'cccc')
+    cache.put('d', 'default', b'd' * 11)
+
+    assert [cache.get(key, 'default') for key in 'abcd'] == [b'aaaa', None, b'cccc', None]
+
+
+def test_entries_expire_after_the_ttl():
+    cache = QueryCache(ttl=0.1)
+    cache.put('a', 'default', b'aaaa')
+    assert cache.get('a', 'default') == b'aaaa'
+
+    time.sleep(0.2)
+    assert cache.get('a', 'default') is None
+
+
+def test_hits_skip_the_request(connect):
+    connect(QueryCache())
+    query = Query()
+
+    assert query.ask(ASK) and query.ask('ASK WHERE{?s ?p ?o}')
+    assert query.ask(ASK, cache=False)
+    assert _asked() == 2
+
+
+def test_disk_tier_survives_a_new_cache(connect, tmp_path):
+    connect(QueryCache(directory=tmp_path))
+    Query().ask(ASK)
+
+    connect(QueryCache(directory=tmp_path))
+    Query().ask(ASK)
+
+    assert _asked() == 1
+
+
+@pytest.mark.parametrize('write', [
+    lambda application: _query(application).update('INSERT DATA { <urn:a> <urn:b> "c" }'),
+    lambda application: _admin(application).import_content('<urn:a> <urn:b> "c" .', 'application/n-triples'),
+    lambda application: _admin(application).reset(),
+])
+def test_writes_invalidate_their_application(connect, write):
+    connect(QueryCache())
+    for application in ('a', 'b', 'a', 'b'):
+        _query(application).ask(ASK)
+    assert _asked() == 2
+
+    write('a')
+    _query('a').ask(ASK)
+    _query('b').ask(ASK)
+
+    assert _asked() == 3
+
+
+def test_responses_requested_before_a_write_are_not_cached(connect):
+    connect(QueryCache())
+    _AskHandler.release.clear()
+    query = Query()
+    reading = threading.Thread(target=query.ask, args=(ASK,))
+    reading.start()
+
+    assert _AskHandler.arrived.wait(5)
+    query.update('INSERT DATA { <urn:a> <urn:b> "c" }')
+    _AskHandler.release.set()
+    reading.join()
+    query.ask(ASK)
+
+    assert _asked() == 2
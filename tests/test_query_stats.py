@@ -0,0 +1,78 @@
+import gzip
+
+import pytest
+
+import entitygraph
+from conftest import MockHandler
+from entitygraph.query import Query
+from entitygraph.query_stats import QueryStats, QueryStatsRegistry, query_hash
+
+# A compressible result of 1000 rows
+CSV = 'a,b\n' + '1,2\n' * 1000
+GZIPPED = gzip.compress(CSV.encode('utf-8'), mtime=0)
+
+
+def _stats(query: str, total: float, size: int = 0) -> QueryStats:
+    stats = QueryStats(query, 'entities', 'api/query/select')
+    stats.request_time = total
+    stats.bytes = size
+    return stats
+
+
+def test_record_aggregates_by_the_normalized_query():
+    registry = QueryStatsRegistry()
+    registry.record(_stats('SELECT * WHERE{?s ?p ?o}', 1.0, 10))
+    registry.record(_stats('SELECT *\nWHERE { ?s ?p ?o } # all', 3.0, 20))
+    registry.record(_stats('SELECT ?s WHERE { ?s ?p ?o }', 0.5))
+
+    aggregate = registry.get(query_hash('SELECT * WHERE { ?s ?p ?o }'))
+
+    assert aggregate.query == 'SELECT * WHERE { ?s ?p ?o }'
+    assert (aggregate.executions, aggregate.total_time, aggregate.mean_time, aggregate.max_time) == (2, 4.0, 2.0, 3.0)
+    assert aggregate.bytes == 30
+
+
+def test_worst():
+    registry = QueryStatsRegistry()
+    for query, totals in (('ASK { ?s ?p 1 }', [1.0] * 5), ('ASK { ?s ?p 2 }', [4.0]), ('ASK { ?s ?p 3 }', [2.0])):
+        for total in totals:
+            registry.record(_stats(query, total))
+
+    assert [aggregate.query for aggregate in registry.worst(2)] == ['ASK { ?s ?p 1 }', 'ASK { ?s ?p 2 }']
+    assert [aggregate.query for aggregate in registry.worst(1, by='max_time')] == ['ASK { ?s ?p 2 }']
+    with pytest.raises(ValueError):
+        registry.worst(by='query')
+
+
+def test_least_recently_executed_queries_are_dropped():
+    registry = QueryStatsRegistry(max_queries=2)
+    registry.record(_stats('ASK { ?s ?p 1 }', 1.0))
+    registry.record(_stats('ASK { ?s ?p 2 }', 1.0))
+    registry.record(_stats('ASK { ?s ?p 1 }', 1.0))
+    registry.record(_stats('ASK { ?s ?p 3 }', 1.0))
+
+    assert sorted(aggregate.query for aggregate in registry.worst()) == ['ASK { ?s ?p 1 }', 'ASK { ?s ?p 3 }']
+
+
+class _GzipHandler(MockHandler):
+    def do_POST(self):
+        self.read_body()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(GZIPPED)))
+        self.end_headers()
+        self.wfile.write(GZIPPED)
+
+
+@pytest.mark.parametrize('timeout', [None, 10])
+def test_bytes_are_counted_as_received(mock_server, timeout):
+    mock_server(_GzipHandler)
+    registry = QueryStatsRegistry()
+    entitygraph._base_client.query_stats = registry
+    query = Query()
+
+    assert len(query.select('SELECT * WHERE { ?s ?p ?o }', timeout=timeout)) == 1000
+
+    assert query.last_stats.bytes == len(GZIPPED)
+    assert registry.worst()[0].bytes == query.last_stats.bytes
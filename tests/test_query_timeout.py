@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from conftest import MockHandler
+from entitygraph.query import Query
+
+QUERY = 'SELECT * WHERE { ?s ?p ?o }'
+# Seconds the server needs to send a result, the timeouts of the tests (0.5 seconds) end the transfers well before
+TRANSFER = 2.0
+
+
+class _TricklingHandler(MockHandler):
+    # Sends a CSV result of 20 rows within TRANSFER seconds, each read finishes well within any socket timeout
+    rows = [b'a,b\n'] + [b'1,2\n'] * 20
+
+    def do_POST(self):
+        self.read_body()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(sum(len(row) for row in self.rows)))
+        self.end_headers()
+        try:
+            for row in self.rows:
+                self.wfile.write(row)
+                self.wfile.flush()
+                time.sleep(TRANSFER / 20)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+@pytest.fixture
+def query(mock_server):
+    mock_server(_TricklingHandler)
+    # pandas is imported on the first select, not within the measured time
+    import pandas  # noqa: F401
+    return Query()
+
+
+def test_select_timeout_limits_the_whole_transfer(query):
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        query.select(QUERY, timeout=0.5)
+
+    # Only the complete transfer would take longer, the socket timeout alone never expires
+    assert time.perf_counter() - start < TRANSFER
+
+
+def test_select_without_timeout_waits_for_the_result(query):
+    assert len(query.select(QUERY)) == 20
+
+
+def test_submit_timeout(query):
+    with pytest.raises(TimeoutError):
+        query.submit(QUERY, timeout=0.5).result(timeout=TRANSFER)
+
+
+def test_select_many_deadline(query):
+    start = time.perf_counter()
+    batch = query.select_many([QUERY] * 4, max_workers=2, deadline=0.5)
+
+    # Two rounds of two complete transfers would take twice as long
+    assert time.perf_counter() - start < TRANSFER
+    assert sorted(batch.completed) == [0, 1, 2, 3]
+    assert all(isinstance(result, TimeoutError) for result in batch.results)
+
+
+def test_set_max_workers(query):
+    Query.set_max_workers(2)
+    try:
+        assert Query._shared_executor()._max_workers == 2
+    finally:
+        Query.set_max_workers(8)
@@ -0,0 +1,35 @@
+import json
+
+from entitygraph import sparql_results
+
+XSD = 'http://www.w3.org/2001/XMLSchema#'
+
+
+def test_tsv_types_numbers_and_keeps_unknown_tokens_as_plain_literals():
+    content = '?n\t?d\t?x\n42\t1.5e3\tabc\n7\t-2E-1\t"def"\n'.encode('utf-8')
+
+    df = sparql_results.to_dataframe(*sparql_results.parse_tsv(content))
+
+    assert list(df['n']) == [42, 7]
+    assert list(df['d']) == [1500.0, -0.2]
+    assert list(df['x']) == ['abc', 'def']
+
+
+def test_json_typed_literals_of_sparql_1_0_endpoints():
+    content = json.dumps({'head': {'vars': ['n']}, 'results': {'bindings': [
+        {'n': {'type': 'typed-literal', 'value': '1', 'datatype': XSD + 'integer'}},
+        {'n': {'type': 'typed-literal', 'value': '2', 'datatype': XSD + 'int'}},
+    ]}}).encode('utf-8')
+
+    df = sparql_results.to_dataframe(*sparql_results.parse_json(content))
+
+    assert str(df['n'].dtype) == 'Int64'
+    assert list(df['n']) == [1, 2]
+
+
+def test_ill_typed_literals_are_kept_as_strings():
+    content = json.dumps({'head': {'vars': ['n']}, 'results': {'bindings': [
+        {'n': {'type': 'literal', 'value': 'abc', 'datatype': XSD + 'integer'}},
+    ]}}).encode('utf-8')
+
+    assert list(sparql_results.to_dataframe(*sparql_results.parse_json(content))['n']) == ['abc']
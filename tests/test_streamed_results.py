@@ -0,0 +1,110 @@
+import select
+import socket
+import threading
+
+import pytest
+from rdflib import Graph
+
+from conftest import MockHandler
+from entitygraph.query import Query
+
+PAGE = 100
+TRIPLES = [f'<https://example.org/e{i}> <https://schema.org/name> "Entity {i}" .\n' for i in range(20 * PAGE)]
+ROWS = ['entity,name\n'] + [f'https://example.org/e{i},"Entity, {i}"\n' for i in range(20 * PAGE - 1)]
+
+
+class _PagesHandler(MockHandler):
+    # Sends the result in pages of lines, all but the first page only once the client took its first item.
+    # Stops if the client closed the connection by then.
+    lines = TRIPLES
+    page = PAGE
+    content_type = 'application/n-triples'
+    pages = 0
+    taken = threading.Event()
+    closed = False
+    done = threading.Event()
+
+    def do_POST(self):
+        self.read_body()
+        try:
+            self.respond_chunked(self._pages(), self.content_type)
+        finally:
+            self.done.set()
+
+    def _client_closed(self) -> bool:
+        # Closed connections are readable, at their end (or reset if the client did not read all data)
+        if not select.select([self.connection], [], [], 0)[0]:
+            return False
+        try:
+            return not self.connection.recv(1, socket.MSG_PEEK)
+        except ConnectionResetError:
+            return True
+
+    def _pages(self):
+        for start in range(0, len(self.lines), self.page):
+            if start == self.page:
+                self.taken.wait(5)
+                if self._client_closed():
+                    _PagesHandler.closed = True
+                    return
+            _PagesHandler.pages += 1
+            yield ''.join(self.lines[start:start + self.page]).encode('utf-8')
+
+
+@pytest.fixture
+def query(mock_server):
+    _PagesHandler.lines, _PagesHandler.content_type, _PagesHandler.pages = TRIPLES, 'application/n-triples', 0
+    _PagesHandler.page = PAGE
+    _PagesHandler.closed = False
+    _PagesHandler.taken.clear()
+    _PagesHandler.done.clear()
+    mock_server(_PagesHandler)
+    return Query()
+
+
+def test_construct_iter_parses_while_receiving(query):
+    triples = query.construct_iter('CONSTRUCT WHERE { ?s ?p ?o }')
+
+    first = next(triples)
+    assert _PagesHandler.pages == 1
+    _PagesHandler.taken.set()
+
+    assert str(first[2]) == 'Entity 0'
+    assert len(list(triples)) == len(TRIPLES) - 1
+    assert _PagesHandler.pages == 20
+
+
+def test_construct_into_a_graph(query):
+    _PagesHandler.taken.set()
+    graph = Graph()
+
+    assert query.construct_into('CONSTRUCT WHERE { ?s ?p ?o }', graph, batch_size=300) is graph
+    assert len(graph) == len(TRIPLES)
+
+
+def test_select_iter_yields_rows_while_receiving(query):
+    _PagesHandler.lines, _PagesHandler.content_type = ROWS, 'text/csv'
+    rows = query.select_iter('SELECT ?entity ?name WHERE { ?entity <https://schema.org/name> ?name }', rows=True)
+
+    assert next(rows) == ('https://example.org/e0', 'Entity, 0')
+    assert _PagesHandler.pages == 1
+    _PagesHandler.taken.set()
+
+    assert len(list(rows)) == len(ROWS) - 2
+    assert _PagesHandler.pages == 20
+
+
+@pytest.mark.parametrize('rows', [True, False])
+def test_select_iter_closes_the_connection_when_stopped(query, rows):
+    _PagesHandler.lines, _PagesHandler.content_type = ROWS * 10, 'text/csv'
+    # DataFrame chunks are parsed from blocks of 256 KB
+    _PagesHandler.page = PAGE if rows else 100 * PAGE
+    results = query.select_iter('SELECT ?entity ?name WHERE { ?entity <https://schema.org/name> ?name }',
+                                chunksize=10, rows=rows)
+
+    next(results)
+    results.close()
+    _PagesHandler.taken.set()
+
+    assert _PagesHandler.done.wait(5)
+    assert _PagesHandler.closed
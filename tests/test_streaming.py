@@ -0,0 +1,67 @@
+import gzip
+import io
+import mmap
+
+import pytest
+
+from conftest import MockHandler
+from entitygraph import Admin, streaming
+
+# Non-ASCII characters are split across chunks of bytes (but not of characters)
+TEXT = ''.join(f'<urn:e{i}> <urn:name> "Größe {i} – ✓" .\n' for i in range(500))
+DATA = TEXT.encode('utf-8')
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    (tmp_path / 'data.nt').write_bytes(DATA)
+    binary, text = open(tmp_path / 'data.nt', 'rb'), open(tmp_path / 'data.nt', encoding='utf-8')
+    mapped = mmap.mmap(binary.fileno(), 0, access=mmap.ACCESS_READ)
+    yield {'str': TEXT, 'bytes': DATA, 'bytearray': bytearray(DATA), 'memoryview': memoryview(DATA), 'mmap': mapped,
+            'binary file': binary, 'text file': text, 'in-memory file': io.BytesIO(DATA),
+            'str generator': (line + '\n' for line in TEXT.splitlines()),
+            'bytes generator': (line for line in DATA.splitlines(keepends=True))}
+    mapped.close()
+    binary.close()
+    text.close()
+
+
+@pytest.mark.parametrize('chunk_size', [7, 1024 * 1024])
+def test_chunks_reassemble_the_content(inputs, chunk_size):
+    for name, content in inputs.items():
+        chunks = list(streaming.iter_chunks(content, chunk_size))
+
+        assert b''.join(chunks) == DATA, name
+        assert all(isinstance(chunk, bytes) for chunk in chunks), name
+        if 'generator' not in name:
+            # Characters of strings are encoded after splitting, into up to 3 bytes each
+            assert max(len(chunk) for chunk in chunks) <= chunk_size * (3 if name in ('str', 'text file') else 1), name
+
+
+def test_gzip_chunks_decompress_to_the_content():
+    compressed = list(streaming.gzip_chunks(streaming.iter_chunks(DATA, 1024)))
+
+    assert sum(len(chunk) for chunk in compressed) < len(DATA)
+    assert gzip.decompress(b''.join(compressed)) == DATA
+    assert gzip.decompress(b''.join(streaming.gzip_chunks([]))) == b''
+
+
+class _ImportHandler(MockHandler):
+    requests = []
+
+    def do_POST(self):
+        self.requests.append((self.headers.get('Content-Encoding'), self.read_body()))
+        self.respond()
+
+
+def test_import_content_streams_the_content(mock_server):
+    _ImportHandler.requests = []
+    mock_server(_ImportHandler)
+
+    Admin().import_content(TEXT, 'application/n-triples', chunk_size=1024)
+    Admin().import_content(io.BytesIO(DATA), 'application/n-triples', compress=True, chunk_size=1024)
+
+    (plain_encoding, plain), (gzip_encoding, compressed) = _ImportHandler.requests
+    assert (plain_encoding, plain) == (None, DATA)
+    assert gzip_encoding == 'gzip'
+    assert gzip.decompress(compressed) == DATA
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+from rdflib import BNode, Graph, Literal, URIRef
+
+from conftest import MockHandler
+from entitygraph.query import Query
+from entitygraph.update_batcher import UpdateBatcher, UpdateBatchError
+
+SDO = 'https://schema.org/'
+
+
+def _triple(i: int) -> tuple:
+    return URIRef(f'https://example.org/e{i}'), URIRef(SDO + 'name'), Literal(f'Entity {i}')
+
+
+class _RecordingQuery:
+    # Records the updates in the order they were sent, inserts take a while
+    def __init__(self):
+        self.updates = []
+        self._lock = threading.Lock()
+
+    def update(self, update: str, repository: str = "entities"):
+        if update.startswith('INSERT DATA'):
+            time.sleep(0.05)
+        with self._lock:
+            self.updates.append(update)
+
+
+def _statements(update: str) -> Graph:
+    return Graph().parse(data=update[update.index('{') + 1:update.rindex('}')], format='nt')
+
+
+class _FailingQuery:
+    def __init__(self):
+        self.updates = []
+
+    def update(self, update: str, repository: str = "entities"):
+        self.updates.append(update)
+        raise Exception("Request failed with status 500")
+
+
+def test_context_manager_raises_for_failed_batches():
+    query = _FailingQuery()
+    triple = (URIRef('https://example.org/a'), URIRef('https://schema.org/name'), Literal('A'))
+
+    with pytest.raises(UpdateBatchError) as raised:
+        with UpdateBatcher(query) as batch:
+            batch.insert([triple]).update('DELETE WHERE { ?s ?p ?o }')
+
+    assert len(query.updates) == 1
+    assert [result.index for result in raised.value.failed] == [0, 1]
+    assert len(raised.value.results) == 2
+
+
+def test_batches_are_split_by_count_and_size():
+    query = _RecordingQuery()
+    by_count = UpdateBatcher(query, max_statements=3).insert(_triple(i) for i in range(10)).flush()
+    # Each statement is 64 bytes with its line break
+    by_size = UpdateBatcher(query, max_bytes=150).insert(_triple(i) for i in range(5)).flush()
+
+    assert [result.operations for result in by_count] == [3, 3, 3, 1]
+    assert [result.operations for result in by_size] == [2, 2, 1]
+    assert sorted(len(_statements(update)) for update in query.updates) == [1, 1, 2, 2, 3, 3, 3]
+
+
+def test_statements_connected_by_blank_nodes_are_sent_together():
+    query = _RecordingQuery()
+    address, geo = BNode(), BNode()
+    connected = [(URIRef('https://example.org/e0'), URIRef(SDO + 'address'), address),
+                 (address, URIRef(SDO + 'geo'), geo),
+                 (geo, URIRef(SDO + 'latitude'), Literal('52.5'))]
+
+    results = UpdateBatcher(query, max_statements=2, max_concurrency=1) \
+        .insert([connected[0], _triple(1), connected[1], _triple(2), _triple(3), connected[2]]).flush()
+
+    assert [result.operations for result in results] == [3, 2, 1]
+    first = _statements(query.updates[0])
+    assert len(first) == 3 and (None, URIRef(SDO + 'latitude'), Literal('52.5')) in first
+
+
+def test_order_of_inserts_deletes_and_updates_is_kept():
+    query = _RecordingQuery()
+
+    UpdateBatcher(query, max_statements=1) \
+        .insert([_triple(0), _triple(1), _triple(2)]).delete([_triple(0)]).update('CLEAR DEFAULT') \
+        .insert([_triple(3)]).flush()
+
+    kinds = [update.split(' ', 1)[0] for update in query.updates]
+    assert kinds == ['INSERT', 'INSERT', 'INSERT', 'DELETE', 'CLEAR', 'INSERT']
+    assert _triple(0) in _statements(query.updates[3])
+    assert _triple(3) in _statements(query.updates[5])
+
+
+class _AskHandler(MockHandler):
+    def do_POST(self):
+        query = self.read_body().decode('utf-8')
+        if 'json' in query:
+            self.respond('{"head": {}, "boolean": false}', 'application/sparql-results+json')
+        else:
+            self.respond('true', 'text/plain')
+
+
+def test_ask(mock_server):
+    mock_server(_AskHandler)
+
+    assert Query().ask('ASK { ?s ?p "json" }') is False
+    assert Query().ask('ASK { ?s ?p "text" }') is True